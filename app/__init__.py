@@ -13,20 +13,8 @@ login_manager = LoginManager()
 csrf = CSRFProtect()
 talisman = Talisman()
 
-def create_app():
-    app = Flask(__name__)
-    is_production = os.environ.get('FLASK_ENV') == 'production'
-
-    # CONFIGURAÇÕES DE SEGURANÇA
-    # ===========================
-    secret_key = os.environ.get('SECRET_KEY')
-    if not secret_key:
-        raise RuntimeError(
-            "SECRET_KEY não definida. Defina a variável de ambiente SECRET_KEY."
-        )
-    app.config['SECRET_KEY'] = secret_key
-
-    # Configuração do banco de dados
+def get_database_url():
+    """DATABASE_URL normalizada (também usada pela API ASGI)."""
     database_url = os.environ.get('DATABASE_URL')
     if database_url and database_url.startswith('postgres://'):
         database_url = database_url.replace('postgres://', 'postgresql://', 1)
@@ -42,14 +30,41 @@ def create_app():
     if not database_url:
         base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
         database_url = f'sqlite:///{os.path.join(base_dir, "site.db")}'
+    return database_url
+
+def create_app():
+    app = Flask(__name__)
+    is_production = os.environ.get('FLASK_ENV') == 'production'
+
+    # CONFIGURAÇÕES DE SEGURANÇA
+    # ===========================
+    secret_key = os.environ.get('SECRET_KEY')
+    if not secret_key:
+        raise RuntimeError(
+            "SECRET_KEY não definida. Defina a variável de ambiente SECRET_KEY."
+        )
+    app.config['SECRET_KEY'] = secret_key
+
+    # Configuração do banco de dados
+    database_url = get_database_url()
 
     app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-        'pool_recycle': 300,
-        'pool_pre_ping': True
-    }
+
+    # Perfil do engine (pool, pragmas do SQLite, timeouts do PostgreSQL; ver database.py)
+    app.config['DB_ENGINE_PROFILE'] = os.environ.get('DB_ENGINE_PROFILE', 'auto')
+    app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 0)) or None
+    app.config['DB_MAX_OVERFLOW'] = int(os.environ['DB_MAX_OVERFLOW']) if os.environ.get('DB_MAX_OVERFLOW') else None
+    app.config['DB_MAX_CONNECTIONS'] = int(os.environ.get('DB_MAX_CONNECTIONS', 0)) or None
+    app.config['DB_POOL_TIMEOUT'] = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+    app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 300))
+    app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', '0') == '1'
+    app.config['DB_STATEMENT_TIMEOUT'] = int(os.environ.get('DB_STATEMENT_TIMEOUT', 30000))
+    app.config['DB_IDLE_IN_TRANSACTION_TIMEOUT'] = int(os.environ.get('DB_IDLE_IN_TRANSACTION_TIMEOUT', 60000))
+    app.config['SQLITE_BUSY_TIMEOUT'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000))
+    app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 64 * 1024 * 1024))
+    app.config['SQLITE_CACHE_SIZE'] = int(os.environ.get('SQLITE_CACHE_SIZE', 16 * 1024))
 
     # Segurança adicional
     app.config['SESSION_COOKIE_SECURE'] = is_production
@@ -57,25 +72,65 @@ def create_app():
     app.config['REMEMBER_COOKIE_SECURE'] = is_production
     app.config['REMEMBER_COOKIE_HTTPONLY'] = True
 
+    # Cache de páginas públicas (invalidado automaticamente ao salvar conteúdo)
+    app.config['PAGE_CACHE_ENABLED'] = os.environ.get('PAGE_CACHE_ENABLED', '1') == '1'
+    app.config['PAGE_CACHE_MAX_ENTRIES'] = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 512))
+    app.config['PAGE_CACHE_TTL'] = int(os.environ.get('PAGE_CACHE_TTL', 3600))
+    app.config['CACHE_STAMP_DIR'] = os.environ.get('CACHE_STAMP_DIR')
+
+    # Cache de trechos de template ({% cache %}, ver fragments.py)
+    app.config['FRAGMENT_CACHE_ENABLED'] = os.environ.get('FRAGMENT_CACHE_ENABLED', '1') == '1'
+    app.config['FRAGMENT_CACHE_MAX_ENTRIES'] = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 256))
+    app.config['FRAGMENT_CACHE_TTL'] = int(os.environ.get('FRAGMENT_CACHE_TTL', 3600))
+
+    # Métricas de desempenho (Server-Timing, /admin/metricas e /metrics)
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') == '1'
+    app.config['METRICS_SERVER_TIMING'] = os.environ.get('METRICS_SERVER_TIMING', '0') == '1'
+    app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR')
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+    # Compressão brotli/gzip das respostas dinâmicas
+    app.config['COMPRESS_ENABLED'] = os.environ.get('COMPRESS_ENABLED', '1') == '1'
+    app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 500))
+
+    # Preload dos assets do <head> (cabeçalho Link / 103 Early Hints) e streaming do HTML
+    app.config['EARLY_HINTS_ENABLED'] = os.environ.get('EARLY_HINTS_ENABLED', '1') == '1'
+    app.config['STREAM_TEMPLATES'] = os.environ.get('STREAM_TEMPLATES', '0') == '1'
+
+    # Fontes originais baixadas por `flask fonts build` (padrão: instance/font-sources)
+    app.config['FONTS_SOURCE_DIR'] = os.environ.get('FONTS_SOURCE_DIR')
+
+    # Bytecode dos templates em disco (pré-compilado pelo gunicorn.conf.py)
+    app.config['TEMPLATE_BYTECODE_CACHE'] = os.environ.get('TEMPLATE_BYTECODE_CACHE', '1') == '1'
+    app.config['TEMPLATE_BYTECODE_DIR'] = os.environ.get('TEMPLATE_BYTECODE_DIR')
+
+    # Login: hash de senha em executor limitado + limite de tentativas (ver passwords.py)
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    app.config['LOGIN_HASH_WORKERS'] = int(os.environ.get('LOGIN_HASH_WORKERS', 1))
+    # Sem a variável: o que couber deixando uma thread do worker livre (ver passwords.py)
+    app.config['LOGIN_HASH_QUEUE'] = (int(os.environ['LOGIN_HASH_QUEUE']) if os.environ.get('LOGIN_HASH_QUEUE')
+                                      else None)
+    app.config['LOGIN_HASH_TIMEOUT'] = float(os.environ.get('LOGIN_HASH_TIMEOUT', 10))
+    app.config['LOGIN_RATE_IP'] = os.environ.get('LOGIN_RATE_IP', '10/60')
+    app.config['LOGIN_RATE_USERNAME'] = os.environ.get('LOGIN_RATE_USERNAME', '20/300')
+    app.config['LOGIN_TRUSTED_PROXIES'] = int(os.environ.get('LOGIN_TRUSTED_PROXIES', 0))
+
+    # Tarefas em segundo plano (iniciadas pelo gunicorn.conf.py em cada worker)
+    app.config['SCHEDULER_ENABLED'] = os.environ.get('SCHEDULER_ENABLED', '1') == '1'
+    app.config['SCHEDULER_DIR'] = os.environ.get('SCHEDULER_DIR')
+
     csp = {
         'default-src': ["'self'"],
         'script-src': [
             "'self'",
-            'https://www.googletagmanager.com',
-            'https://cdnjs.cloudflare.com',
-            "'nonce-{nonce}'"
+            'https://www.googletagmanager.com'
         ],
+        # 'unsafe-inline': CSS crítico em <style> (critical.py) e atributos style do admin
         'style-src': [
             "'self'",
-            "'unsafe-inline'",
-            'https://fonts.googleapis.com',
-            'https://cdnjs.cloudflare.com'
-        ],
-        'font-src': [
-            "'self'",
-            'https://fonts.gstatic.com',
-            'https://cdnjs.cloudflare.com'
+            "'unsafe-inline'"
         ],
+        'font-src': ["'self'"],
         'img-src': ["'self'", 'data:', 'https:'],
         'connect-src': [
             "'self'",
@@ -87,14 +142,71 @@ def create_app():
     }
 
     # Inicializar extensões
+    from .database import db_profile
+    db_profile.configure(app)
     db.init_app(app)
     migrate.init_app(app, db)
+    db_profile.init_app(app)
+
+    # Registrado primeiro para medir todo o restante da requisição
+    from .metrics import metrics
+    metrics.init_app(app)
+
+    # Roda depois dos demais after_request (que podem mexer no corpo ou nos cabeçalhos)
+    from .compression import compression
+    compression.init_app(app)
+
+    from .cache import page_cache
+    page_cache.init_app(app)
+
+    # Trechos de template invalidados pelos mesmos modelos do cache de páginas
+    from .fragments import fragment_cache
+    fragment_cache.init_app(app)
+
+    # Índice full-text do blog (FTS5 no SQLite, tsvector no PostgreSQL)
+    from .search import search_index
+    search_index.init_app(app)
+
+    # Assets com fingerprint (gerados por `flask assets build`)
+    from .assets import assets
+    assets.init_app(app)
+
+    # Derivados responsivos das imagens (gerados por `flask images build`)
+    from .images import responsive_images
+    responsive_images.init_app(app)
+
+    # Fontes e ícones reduzidos ao que é usado (gerados por `flask fonts build`)
+    from .fonts import CDN_ORIGINS, web_fonts
+    web_fonts.init_app(app)
+    if not web_fonts.self_hosted:
+        for directive, origins in CDN_ORIGINS.items():
+            csp[directive].extend(origins)
+
+    # CSS crítico inline por template (gerado por `flask assets critical`)
+    from .critical import critical
+    critical.init_app(app)
+
+    # Cabeçalho Link/Early Hints aprendido do <head> de cada endpoint
+    from .hints import early_hints
+    early_hints.init_app(app)
+
+    # Bytecode dos templates em disco (ver warmup.py)
+    from . import warmup
+    warmup.init_app(app)
+
+    # Tarefas em segundo plano: expiração de eventos, sitemap, cache, métricas
+    from .scheduler import scheduler
+    scheduler.init_app(app)
+
+    from .passwords import login_guard
+    login_guard.init_app(app)
+
     csrf.init_app(app)
     talisman.init_app(
         app,
         force_https=is_production,
         content_security_policy=csp,
-        content_security_policy_nonce_in=['script']
+        content_security_policy_nonce_in=['script-src']
     )
 
     # Configurar Flask-Login
@@ -103,12 +215,11 @@ def create_app():
     login_manager.login_message = 'Por favor, faça login para acessar esta página.'
     login_manager.session_protection = 'strong'
 
-    from .models import Usuario
     from datetime import datetime
 
-    @login_manager.user_loader
-    def load_user(user_id):
-        return Usuario.query.get(int(user_id))
+    # Usuário logado vem de um cache de retratos (sem consulta por requisição)
+    from .auth import load_user
+    login_manager.user_loader(load_user)
 
     @app.context_processor
     def inject_globals():
@@ -163,5 +274,8 @@ def create_app():
     if os.environ.get('FLASK_ENV') != 'production':
         with app.app_context():
             db.create_all()
+            from .search import create_schema
+            with db.engine.begin() as connection:
+                create_schema(connection)
 
     return app
\ No newline at end of file
@@ -3,7 +3,14 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user, login_user, logout_user
 from app import db
 from app.models import Post, Depoimento, Usuario, Evento
+from app.pagination import keyset_paginate
+from app.metrics import metrics
+from app.database import db_profile
+from app.scheduler import scheduler
+from app.passwords import LoginBusy, login_guard
+from app.queries import POST_ADMIN_LIST, dashboard_stats, user_has_posts
 from datetime import datetime, timezone
+from math import ceil
 from urllib.parse import urlparse
 import bleach
 
@@ -53,9 +60,9 @@ def normalize_external_url(raw_url):
         return None
     return value
 
-def get_page_number():
-    """Obtém o número da página atual para paginação."""
-    return request.args.get('page', 1, type=int)
+def get_cursor():
+    """Obtém o cursor da página atual para paginação."""
+    return request.args.get('cursor')
 
 # Rota de login
 @admin_bp.route('/login', methods=['GET', 'POST'])
@@ -67,10 +74,21 @@ def login():
         if not username or not password:
             flash('Usuário e senha são obrigatórios.', 'error')
             return render_template('admin/login.html'), 400
-        
+
+        # Recusa o excesso antes de calcular qualquer hash
+        retry_after = login_guard.throttle(username)
+        if retry_after:
+            flash(f'Muitas tentativas de login. Tente novamente em {ceil(retry_after)} segundos.', 'error')
+            return render_template('admin/login.html'), 429, {'Retry-After': str(ceil(retry_after))}
+
         user = Usuario.query.filter_by(username=username).first()
-        
-        if user and user.check_password(password):
+        try:
+            valid = login_guard.verify(user, password)
+        except LoginBusy:
+            flash('Muitos logins ao mesmo tempo. Tente novamente em instantes.', 'error')
+            return render_template('admin/login.html'), 503, {'Retry-After': '5'}
+
+        if valid:
             if not user.is_active:
                 flash('Usuário desativado. Contate outro administrador.', 'error')
                 return render_template('admin/login.html'), 403
@@ -99,23 +117,21 @@ def logout():
 @admin_bp.route('/')
 @login_required
 def dashboard():
-    posts_count = Post.query.count()
-    published_posts = Post.query.filter_by(is_published=True).count()
-    depoimentos_count = Depoimento.query.count()
-    eventos_count = Evento.query.count()
-    
-    return render_template('admin/dashboard.html', 
-                         posts_count=posts_count,
-                         published_posts=published_posts,
-                         depoimentos_count=depoimentos_count,
-                         eventos_count=eventos_count)
+    return render_template('admin/dashboard.html', **dashboard_stats())
+
+# Métricas de desempenho (somadas entre os workers)
+@admin_bp.route('/metricas')
+@login_required
+def metricas():
+    return render_template('admin/metricas.html', rows=metrics.summary(), jobs=scheduler.status(),
+                           logins=login_guard.summary(), database=db_profile.pool_status())
 
 # Gestão de Posts
 @admin_bp.route('/posts')
 @login_required
 def posts():
-    page = get_page_number()
-    pagination = Post.query.order_by(Post.date_posted.desc()).paginate(page=page, per_page=10, error_out=False)
+    pagination = keyset_paginate(Post.query.options(*POST_ADMIN_LIST), [Post.date_posted, Post.id], per_page=10,
+                                 descending=True, cursor=get_cursor(), total_key='admin_posts')
     return render_template('admin/posts.html', posts=pagination.items, pagination=pagination)
 
 @admin_bp.route('/posts/new', methods=['GET', 'POST'])
@@ -190,8 +206,8 @@ def delete_post(post_id):
 @admin_bp.route('/depoimentos')
 @login_required
 def depoimentos():
-    page = get_page_number()
-    pagination = Depoimento.query.order_by(Depoimento.id.desc()).paginate(page=page, per_page=10, error_out=False)
+    pagination = keyset_paginate(Depoimento.query, [Depoimento.id], per_page=10,
+                                 descending=True, cursor=get_cursor(), total_key='admin_depoimentos')
     return render_template('admin/depoimentos.html', depoimentos=pagination.items, pagination=pagination)
 
 @admin_bp.route('/depoimentos/new', methods=['GET', 'POST'])
@@ -239,8 +255,8 @@ def delete_depoimento(depoimento_id):
 @admin_bp.route('/eventos')
 @login_required
 def eventos():
-    page = get_page_number()
-    pagination = Evento.query.order_by(Evento.event_date.desc()).paginate(page=page, per_page=10, error_out=False)
+    pagination = keyset_paginate(Evento.query, [Evento.event_date, Evento.id], per_page=10,
+                                 descending=True, cursor=get_cursor(), total_key='admin_eventos')
     return render_template('admin/eventos.html', eventos=pagination.items, pagination=pagination)
 
 @admin_bp.route('/eventos/new', methods=['GET', 'POST'])
@@ -327,8 +343,8 @@ def delete_evento(evento_id):
 @admin_bp.route('/usuarios')
 @login_required
 def usuarios():
-    page = get_page_number()
-    pagination = Usuario.query.order_by(Usuario.date_created.desc()).paginate(page=page, per_page=10, error_out=False)
+    pagination = keyset_paginate(Usuario.query, [Usuario.id], per_page=10,
+                                 descending=True, cursor=get_cursor(), total_key='admin_usuarios')
     return render_template('admin/usuarios.html', usuarios=pagination.items, pagination=pagination)
 
 @admin_bp.route('/usuarios/new', methods=['GET', 'POST'])
@@ -472,7 +488,7 @@ def delete_usuario(usuario_id):
         return redirect(url_for('admin.usuarios'))
     
     # Verificar se o usuário tem posts (opcional - para evitar deletar usuários com conteúdo)
-    if usuario.posts:
+    if user_has_posts(usuario.id):
         flash('Não é possível deletar usuários que possuem posts.', 'error')
         return redirect(url_for('admin.usuarios'))
     
@@ -0,0 +1,177 @@
+# app/api.py
+"""API JSON somente leitura do conteúdo público (ASGI, servida pelo uvicorn).
+
+Roda em um processo separado do gunicorn (ver asgi.py e Procfile) e usa os
+mesmos modelos, mas com engine assíncrona (aiosqlite/asyncpg) e um pool de
+conexões compartilhado. Clientes lentos ou muito numerosos (app mobile,
+widgets de parceiros) ficam no event loop em vez de ocupar workers WSGI.
+
+- Paginação por cursor (`?cursor=`), o mesmo formato das páginas HTML.
+- `?fields=slug,title` escolhe as colunas retornadas (e consultadas).
+"""
+import os
+from contextlib import asynccontextmanager
+from operator import gt, lt
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from . import get_database_url
+from .models import Depoimento, Evento, Post, Usuario
+from .pagination import decode_cursor, encode_cursor, keyset_condition
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+CACHE_CONTROL = 'public, max-age=60'
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+
+class Resource:
+    """Listagem pública: filtro, ordenação por keyset e campos permitidos."""
+
+    def __init__(self, model, columns, default_fields, where, order, descending=False, joins=None):
+        self.model = model
+        self.columns = columns
+        self.joins = joins or {}
+        self.default_fields = default_fields
+        self.where = where
+        self.order = order
+        self.descending = descending
+
+    def fields(self, requested):
+        if not requested:
+            return list(self.default_fields)
+        fields = [field.strip() for field in requested.split(',') if field.strip()]
+        unknown = sorted(set(fields) - set(self.columns))
+        if unknown:
+            raise HTTPException(400, f'Campos inválidos: {", ".join(unknown)}. '
+                                     f'Disponíveis: {", ".join(self.columns)}')
+        return list(dict.fromkeys(fields))
+
+    def select(self, fields):
+        # Colunas da ordenação entram sempre (cursor), mas só os campos pedidos saem
+        keys = [column.label(f'_key{i}') for i, column in enumerate(self.order)]
+        query = (select(*(self.columns[field].label(field) for field in fields), *keys)
+                 .select_from(self.model).where(*self.where))
+        for field in fields:
+            if field in self.joins:
+                query = query.join(*self.joins[field])
+        return query
+
+
+POSTS = Resource(
+    Post,
+    columns={
+        'slug': Post.slug, 'title': Post.title, 'summary': Post.summary, 'content': Post.content,
+        'date_posted': Post.date_posted, 'updated_at': Post.updated_at, 'author': Usuario.username,
+    },
+    default_fields=('slug', 'title', 'summary', 'date_posted', 'updated_at'),
+    where=[Post.is_published.is_(True)],
+    order=[Post.date_posted, Post.id],
+    descending=True,
+    joins={'author': (Usuario, Usuario.id == Post.author_id)},
+)
+EVENTOS = Resource(
+    Evento,
+    columns={
+        'id': Evento.id, 'title': Evento.title, 'description': Evento.description,
+        'event_date': Evento.event_date, 'location': Evento.location,
+        'registration_link': Evento.registration_link, 'updated_at': Evento.updated_at,
+    },
+    default_fields=('id', 'title', 'event_date', 'location', 'registration_link'),
+    where=[Evento.is_active.is_(True)],
+    order=[Evento.event_date, Evento.id],
+)
+DEPOIMENTOS = Resource(
+    Depoimento,
+    columns={'id': Depoimento.id, 'quote': Depoimento.quote, 'author': Depoimento.author},
+    default_fields=('id', 'quote', 'author'),
+    where=[Depoimento.is_visible.is_(True)],
+    order=[Depoimento.id],
+    descending=True,
+)
+
+
+def async_database_url():
+    url = get_database_url()
+    scheme, rest = url.split('://', 1)
+    backend = scheme.split('+', 1)[0]
+    return f'{ASYNC_DRIVERS.get(backend, scheme)}://{rest}'
+
+
+def _json(payload):
+    return JSONResponse(payload, headers={'Cache-Control': CACHE_CONTROL})
+
+
+def _serialize(row, fields):
+    return {field: value.isoformat() if hasattr(value, 'isoformat') else value
+            for field, value in ((field, row[field]) for field in fields)}
+
+
+async def _page(engine, resource, cursor, limit, fields):
+    query = resource.select(fields)
+    order = [c.desc() if resource.descending else c.asc() for c in resource.order]
+    decoded = decode_cursor(cursor, len(resource.order), resource.order)
+    if cursor and (decoded is None or decoded[0] != 'n'):
+        raise HTTPException(400, 'Cursor inválido')
+    if decoded:
+        query = query.where(keyset_condition(resource.order, decoded[1], lt if resource.descending else gt))
+    async with engine.connect() as conn:
+        rows = (await conn.execute(query.order_by(*order).limit(limit + 1))).mappings().all()
+
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor('n', [last[f'_key{i}'] for i in range(len(resource.order))])
+    return {'items': [_serialize(row, fields) for row in items], 'next_cursor': next_cursor}
+
+
+def create_api():
+    @asynccontextmanager
+    async def lifespan(api):
+        # Um pool por processo do uvicorn, compartilhado por todas as requisições
+        url = async_database_url()
+        options = {'pool_pre_ping': True}
+        if not url.startswith('sqlite'):
+            options.update(pool_size=int(os.environ.get('API_POOL_SIZE', 10)),
+                           max_overflow=int(os.environ.get('API_POOL_MAX_OVERFLOW', 10)))
+        api.state.engine = create_async_engine(url, **options)
+        yield
+        await api.state.engine.dispose()
+
+    api = FastAPI(title='CPI API', docs_url='/api/docs', openapi_url='/api/openapi.json', lifespan=lifespan)
+    origins = [o.strip() for o in os.environ.get('API_CORS_ORIGINS', '*').split(',') if o.strip()]
+    api.add_middleware(CORSMiddleware, allow_origins=origins, allow_methods=['GET'])
+    api.add_middleware(GZipMiddleware, minimum_size=int(os.environ.get('COMPRESS_MIN_SIZE', 500)))
+
+    limit_query = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT)
+
+    @api.get('/api/posts')
+    async def list_posts(request: Request, cursor: str = None, limit: int = limit_query, fields: str = None):
+        return _json(await _page(request.app.state.engine, POSTS, cursor, limit, POSTS.fields(fields)))
+
+    @api.get('/api/posts/{slug}')
+    async def get_post(request: Request, slug: str, fields: str = None):
+        selected = POSTS.fields(fields or 'slug,title,summary,content,date_posted,updated_at,author')
+        query = POSTS.select(selected).where(Post.slug == slug)
+        async with request.app.state.engine.connect() as conn:
+            row = (await conn.execute(query)).mappings().first()
+        if row is None:
+            raise HTTPException(404, 'Post não encontrado')
+        return _json(_serialize(row, selected))
+
+    @api.get('/api/eventos')
+    async def list_eventos(request: Request, cursor: str = None, limit: int = limit_query, fields: str = None):
+        return _json(await _page(request.app.state.engine, EVENTOS, cursor, limit, EVENTOS.fields(fields)))
+
+    @api.get('/api/depoimentos')
+    async def list_depoimentos(request: Request, cursor: str = None, limit: int = limit_query, fields: str = None):
+        return _json(await _page(request.app.state.engine, DEPOIMENTOS, cursor, limit, DEPOIMENTOS.fields(fields)))
+
+    return api
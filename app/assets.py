@@ -0,0 +1,165 @@
+# app/assets.py
+"""Pipeline de arquivos estáticos: minificação, fingerprint e pré-compressão.
+
+`flask assets build` gera em static/dist/ uma cópia minificada de cada asset
+com o hash do conteúdo no nome, as variantes .gz/.br e um manifest.json.
+Em runtime, `url_for('static', filename='css/style.css')` passa a apontar para
+a cópia com hash, servida com cache imutável e na codificação aceita pelo
+navegador. Sem manifest, tudo continua funcionando com os arquivos originais.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+
+from flask import current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli é opcional
+    brotli = None
+
+# Assets processados pelo build (caminhos relativos a app/static)
+ASSETS = ['css/style.css', 'css/public.css', 'js/script.js', 'js/gtag.js', 'js/async-css.js']
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+
+def minify_css(source):
+    source = _CSS_COMMENT.sub('', source)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,])\s*', r'\1', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    # Conservador: remove apenas indentação, linhas vazias e comentários de linha inteira
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+def _absolute_css_urls(source, logical_name, static_url_path, images=None):
+    """Reescreve url() relativos, já que o CSS gerado fica em outro diretório.
+
+    Imagens com derivados (`flask images build`) passam a apontar para o maior
+    derivado no formato original em vez do arquivo de vários megabytes.
+    """
+    from .images import largest_variant
+
+    base = posixpath.dirname(logical_name)
+    images = images or {}
+
+    def replace(match):
+        target = match.group(2).strip()
+        if target.startswith(('data:', 'http:', 'https:', '//', '/', '#')):
+            return match.group(0)
+        resolved = posixpath.normpath(posixpath.join(base, target))
+        if resolved in images:
+            resolved = largest_variant(images[resolved])
+        return f'url("{static_url_path}/{resolved}")'
+
+    return _CSS_URL.sub(replace, source)
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.write(data)
+
+
+def build_assets(app):
+    """Gera os arquivos com hash + variantes comprimidas e devolve o manifest."""
+    from .images import load_image_manifest
+
+    static = app.static_folder
+    images = load_image_manifest(app)
+    manifest = {}
+
+    for logical in ASSETS:
+        with open(os.path.join(static, logical), encoding='utf-8') as fh:
+            source = fh.read()
+
+        if logical.endswith('.css'):
+            source = minify_css(_absolute_css_urls(source, logical, app.static_url_path, images))
+        elif logical.endswith('.js'):
+            source = minify_js(source)
+        data = source.encode('utf-8')
+
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        stem, ext = posixpath.splitext(logical)
+        built = posixpath.join(DIST_DIR, f'{stem}.{digest}{ext}')
+        target = os.path.join(static, built)
+
+        _write(target, data)
+        _write(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            _write(target + '.br', brotli.compress(data, quality=11))
+
+        # Remove versões anteriores do mesmo asset
+        directory = os.path.dirname(target)
+        prefix = posixpath.basename(stem) + '.'
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and not name.startswith(os.path.basename(target)):
+                os.remove(os.path.join(directory, name))
+
+        manifest[logical] = built
+
+    _write(os.path.join(static, DIST_DIR, MANIFEST_NAME),
+           json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+class Assets:
+    """Resolve nomes lógicos pelo manifest e serve as variantes pré-comprimidas."""
+
+    def __init__(self):
+        self.manifest = {}
+        self.built = set()
+
+    def init_app(self, app):
+        self.load_manifest(app)
+        app.url_defaults(self._fingerprint)
+        app.view_functions['static'] = self.send_static
+
+    def load_manifest(self, app):
+        path = os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME)
+        try:
+            with open(path, encoding='utf-8') as fh:
+                self.manifest = json.load(fh)
+        except FileNotFoundError:
+            self.manifest = {}
+        self.built = set(self.manifest.values())
+
+    def _fingerprint(self, endpoint, values):
+        if endpoint == 'static':
+            filename = values.get('filename')
+            if filename in self.manifest:
+                values['filename'] = self.manifest[filename]
+
+    def send_static(self, filename):
+        app = current_app._get_current_object()
+        if filename not in self.built:
+            return app.send_static_file(filename)
+
+        mimetype = mimetypes.guess_type(filename)[0]
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[encoding] and os.path.exists(os.path.join(app.static_folder, filename + suffix)):
+                response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(app.static_folder, filename, mimetype=mimetype)
+
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+assets = Assets()
@@ -0,0 +1,61 @@
+# app/auth.py
+"""Cache do `user_loader` do Flask-Login.
+
+Em vez de consultar o banco a cada requisição autenticada, guarda um retrato
+leve do usuário (id, username, email, is_active) por id. O id da sessão
+carrega a versão do usuário (hash da senha + is_active, ver
+Usuario.get_id): se a senha mudar ou o usuário for desativado, a versão da
+sessão deixa de bater e o usuário é deslogado. Ids sem versão (sessões
+anteriores a esse formato) são recusados. Qualquer commit que altere esses
+campos de um Usuario invalida o cache em todos os workers (ver
+CACHED_ATTRIBUTES em cache.py); gravar só o last_login não invalida.
+"""
+from flask_login import UserMixin
+
+from . import db
+from .cache import LRUCache
+from .models import Usuario
+
+_users = LRUCache(max_entries=128, ttl=300)
+
+
+class UserSnapshot(UserMixin):
+    """Dados do usuário logado sem vínculo com a sessão do SQLAlchemy."""
+
+    is_active = False  # sobrescreve a propriedade do UserMixin
+
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.is_active = bool(user.is_active)
+        self.session_version = user.session_version
+
+    def get_id(self):
+        return f'{self.id}:{self.session_version}'
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.username}>'
+
+
+def load_user(user_id):
+    """user_loader: devolve o retrato em cache ou None se a sessão estiver obsoleta."""
+    raw_id, _, version = user_id.partition(':')
+    if not version:
+        return None  # sessão/cookie "lembrar-me" anterior à versão: exige um novo login
+    try:
+        pk = int(raw_id)
+    except ValueError:
+        return None
+
+    snapshot = _users.get(pk)
+    if snapshot is None:
+        user = db.session.get(Usuario, pk)
+        if user is None:
+            return None
+        snapshot = UserSnapshot(user)
+        _users.set(pk, snapshot, tags=(Usuario,))
+
+    if not snapshot.is_active or version != snapshot.session_version:
+        return None
+    return snapshot
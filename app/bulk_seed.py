@@ -0,0 +1,126 @@
+# app/bulk_seed.py
+"""Dados sintéticos em volume para testes de desempenho (`flask seed-bulk`).
+
+Gera posts, eventos e depoimentos com tamanhos e distribuições parecidos com
+os reais (maioria publicada/ativa, datas espalhadas, conteúdo HTML com vários
+parágrafos). Usa INSERTs em lote e uma semente fixa, então a mesma chamada
+produz sempre os mesmos dados.
+"""
+import random
+import secrets
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from . import db
+from .models import Depoimento, Evento, Post, Usuario
+
+WORDS = (
+    'casamento casal amor perdão diálogo comunicação família fé confiança respeito '
+    'paciência cuidado tempo juntos filhos oração propósito aliança restauração '
+    'crise conflito escuta empatia gratidão compromisso intimidade amizade rotina '
+    'finanças sonhos decisões limites esperança mudança crescimento princípios '
+    'bíblicos mentoria encontro jornada lar parceria reconciliação alegria'
+).split()
+CITIES = ['Brasília - DF', 'Goiânia - GO', 'Taguatinga - DF', 'Águas Claras - DF', 'Online']
+
+
+def _sentence(rng, min_words=8, max_words=18):
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    return ' '.join(words).capitalize() + '.'
+
+
+def _paragraphs(rng, count):
+    return ''.join(
+        f'<p>{" ".join(_sentence(rng) for _ in range(rng.randint(3, 6)))}</p>'
+        for _ in range(count)
+    )
+
+
+def _author_id():
+    author = Usuario.query.order_by(Usuario.id).first()
+    if author is None:
+        author = Usuario(username='autor-bulk')
+        author.set_password(secrets.token_urlsafe(16))
+        db.session.add(author)
+        db.session.commit()
+    return author.id
+
+
+def _insert_batches(model, rows, batch_size, progress=None):
+    batch = []
+    inserted = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(insert(model), batch)
+            db.session.commit()
+            inserted += len(batch)
+            batch = []
+            if progress:
+                progress(model.__name__, inserted)
+    if batch:
+        db.session.execute(insert(model), batch)
+        db.session.commit()
+        inserted += len(batch)
+        if progress:
+            progress(model.__name__, inserted)
+    return inserted
+
+
+def _posts(rng, count, author_id, now, prefix):
+    for i in range(count):
+        title = _sentence(rng, 4, 9).rstrip('.')
+        posted = now - timedelta(days=rng.uniform(0, 5 * 365))
+        yield {
+            'slug': f'{prefix}-post-{i}',
+            'title': title,
+            'summary': _sentence(rng, 15, 30),
+            'content': _paragraphs(rng, rng.randint(4, 12)),
+            'date_posted': posted,
+            'updated_at': posted,
+            'is_published': rng.random() < 0.9,
+            'author_id': author_id,
+        }
+
+
+def _eventos(rng, count, now):
+    for _ in range(count):
+        yield {
+            'title': _sentence(rng, 3, 7).rstrip('.'),
+            'description': _sentence(rng, 20, 40),
+            'event_date': now + timedelta(days=rng.uniform(-365, 365)),
+            'location': rng.choice(CITIES),
+            'registration_link': 'https://wa.me/5561996452243' if rng.random() < 0.5 else None,
+            'is_active': rng.random() < 0.7,
+            'updated_at': now,
+        }
+
+
+def _depoimentos(rng, count, now):
+    for _ in range(count):
+        yield {
+            'quote': _sentence(rng, 12, 40),
+            'author': f'{rng.choice(WORDS).capitalize()} & {rng.choice(WORDS).capitalize()}',
+            'is_visible': rng.random() < 0.85,
+            'updated_at': now,
+        }
+
+
+def seed_bulk(posts=0, eventos=0, depoimentos=0, batch_size=1000, seed=42, progress=None):
+    """Insere os registros sintéticos e devolve {modelo: quantidade}."""
+    from .search import rebuild_index
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    # Prefixo aleatório: permite rodar várias vezes sem colidir slugs
+    prefix = f'bulk-{secrets.token_hex(3)}'
+    counts = {
+        'Post': _insert_batches(Post, _posts(rng, posts, _author_id(), now, prefix), batch_size, progress) if posts else 0,
+        'Evento': _insert_batches(Evento, _eventos(rng, eventos, now), batch_size, progress),
+        'Depoimento': _insert_batches(Depoimento, _depoimentos(rng, depoimentos, now), batch_size, progress),
+    }
+    if posts:
+        # INSERT em lote não passa pelo after_flush que mantém o índice de busca
+        rebuild_index()
+    return counts
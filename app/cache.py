@@ -0,0 +1,403 @@
+# app/cache.py
+"""Cache HTTP das páginas públicas: cache de páginas e GET condicional.
+
+O conteúdo público só muda quando alguém salva algo no painel admin. Por isso
+o HTML renderizado fica guardado em memória (LRU) e é descartado quando uma
+transação que altera Post, Depoimento ou Evento faz commit.
+
+Cada worker do gunicorn tem seu próprio cache. Para que o commit feito em um
+worker invalide os demais, cada modelo tem um arquivo de marca (stamp) cujo
+mtime é conferido a cada leitura do cache.
+
+As rotas de conteúdo também enviam ETag (do `updated_at` mais recente e da
+quantidade das linhas exibidas) e Last-Modified (da marca dos modelos, que só
+avança), respondendo 304 sem renderizar.
+"""
+import hashlib
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from itertools import chain
+
+from flask import current_app, g, make_response, request
+from sqlalchemy import event, inspect
+
+# Marcador que substitui a nonce CSP no HTML guardado; a nonce real é
+# reinserida a cada requisição.
+NONCE_PLACEHOLDER = '__cpi_csp_nonce__'
+
+# Modelos cujas escritas invalidam caches (Usuario: cache do user_loader)
+TRACKED_MODELS = {'Post', 'Depoimento', 'Evento', 'Usuario'}
+# Colunas lidas pelos caches quando nem todas são: o login grava last_login e não
+# deve descartar os posts (que mostram o username) nem o cache do user_loader
+CACHED_ATTRIBUTES = {'Usuario': ('username', 'email', 'password_hash', 'is_active')}
+
+_caches = weakref.WeakSet()
+
+
+def _model_names(models):
+    return frozenset(m if isinstance(m, str) else m.__name__ for m in models)
+
+
+class LRUCache:
+    """Cache LRU thread-safe com limite de entradas, TTL e tags de dependência."""
+
+    def __init__(self, max_entries=256, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def get(self, key):
+        content_versions.sync()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, _tags, value = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, tags=(), ttl=None):
+        ttl = ttl or self.ttl
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires, _model_names(tags), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, tags=None):
+        """Remove as entradas ligadas a alguma das tags (todas, se None)."""
+        with self._lock:
+            if tags is None:
+                self._data.clear()
+                return
+            tags = _model_names(tags)
+            for key in [k for k, (_, entry_tags, _) in self._data.items() if entry_tags & tags]:
+                del self._data[key]
+
+    def clear(self):
+        self.invalidate()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ContentVersions:
+    """Versão de cada modelo, compartilhada entre processos via arquivos de marca."""
+
+    def __init__(self):
+        self.directory = None
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.directory = app.config.get('CACHE_STAMP_DIR') or os.path.join(app.instance_path, 'cache')
+        os.makedirs(self.directory, exist_ok=True)
+        self.sync()
+
+    def _path(self, name):
+        return os.path.join(self.directory, f'{name}.stamp')
+
+    def _mtime(self, name):
+        try:
+            return os.stat(self._path(name)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def bump(self, names):
+        if not self.directory:
+            return
+        with self._lock:
+            for name in names:
+                with open(self._path(name), 'w') as stamp:
+                    stamp.write(str(time.time_ns()))
+                self._seen[name] = self._mtime(name)
+
+    def stamps(self, names=TRACKED_MODELS):
+        """{modelo: mtime da marca em ns} (None se o modelo nunca foi alterado)."""
+        if not self.directory:
+            return {}
+        return {name: self._mtime(name) for name in _model_names(names)}
+
+    def sync(self):
+        """Descarta localmente o que outro processo invalidou."""
+        if not self.directory:
+            return
+        changed = set()
+        with self._lock:
+            for name in TRACKED_MODELS:
+                mtime = self._mtime(name)
+                if self._seen.get(name, 0) != mtime:
+                    self._seen[name] = mtime
+                    changed.add(name)
+        if changed:
+            _invalidate_local(changed)
+
+
+content_versions = ContentVersions()
+
+
+def _invalidate_local(names):
+    for cache in list(_caches):
+        cache.invalidate(names)
+
+
+def invalidate_models(*models):
+    """Invalida os caches que dependem dos modelos informados, em todos os workers."""
+    names = _model_names(models)
+    _invalidate_local(names)
+    content_versions.bump(names)
+
+
+# Eventos de sessão: registram os modelos alterados e invalidam no commit
+# ========================================================================
+
+def _pending(session):
+    return session.info.setdefault('cache_changed_models', set())
+
+
+def _changes_cached_data(obj, name):
+    attributes = CACHED_ATTRIBUTES.get(name)
+    if attributes is None:
+        return True
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attributes)
+
+
+def _after_flush(session, flush_context):
+    for obj in chain(session.new, session.deleted):
+        name = type(obj).__name__
+        if name in TRACKED_MODELS:
+            _pending(session).add(name)
+    for obj in session.dirty:
+        name = type(obj).__name__
+        if name in TRACKED_MODELS and _changes_cached_data(obj, name):
+            _pending(session).add(name)
+
+
+def _do_orm_execute(orm_execute_state):
+    # Cobre updates/deletes em massa, como db.session.query(Post).delete()
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_.__name__ in TRACKED_MODELS:
+        _pending(orm_execute_state.session).add(mapper.class_.__name__)
+
+
+def _after_commit(session):
+    names = session.info.pop('cache_changed_models', None)
+    if names:
+        invalidate_models(*names)
+
+
+def _after_rollback(session):
+    session.info.pop('cache_changed_models', None)
+
+
+_listening = False
+
+
+def _listen(db):
+    global _listening
+    if _listening:
+        return
+    event.listen(db.session, 'after_flush', _after_flush)
+    event.listen(db.session, 'do_orm_execute', _do_orm_execute)
+    event.listen(db.session, 'after_commit', _after_commit)
+    event.listen(db.session, 'after_rollback', _after_rollback)
+    _listening = True
+
+
+# Cache de páginas
+# ================
+
+class PageCache(LRUCache):
+    """Guarda o HTML das rotas públicas por endpoint + argumentos + parâmetros lidos pela view."""
+
+    def init_app(self, app):
+        from . import db
+
+        app.config.setdefault('PAGE_CACHE_ENABLED', True)
+        app.config.setdefault('PAGE_CACHE_MAX_ENTRIES', 512)
+        app.config.setdefault('PAGE_CACHE_TTL', 3600)
+        self.max_entries = app.config['PAGE_CACHE_MAX_ENTRIES']
+        self.ttl = app.config['PAGE_CACHE_TTL']
+        app.extensions['templates_mtime'] = _templates_mtime(app)
+        content_versions.init_app(app)
+        _listen(db)
+
+
+page_cache = PageCache()
+
+
+def page_cache_key(params=()):
+    # Só os parâmetros lidos pela view: utm_*, fbclid etc. não criam entradas novas
+    return (
+        request.host,
+        request.endpoint,
+        tuple(sorted((request.view_args or {}).items())),
+        tuple(sorted((name, value) for name, value in request.args.items(multi=True) if name in params)),
+    )
+
+
+class CachedPage:
+    """HTML guardado de uma página + variantes comprimidas (ver compression.py)."""
+
+    __slots__ = ('body', 'mimetype', 'encoded')
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.encoded = {}  # {'br'|'gzip': bytes}, preenchido na primeira resposta comprimida
+
+    @property
+    def reusable(self):
+        # Com nonce o HTML muda a cada requisição e os bytes comprimidos não servem
+        return NONCE_PLACEHOLDER not in self.body
+
+
+def _store(key, body, mimetype, nonce, models):
+    if nonce:
+        body = body.replace(nonce, NONCE_PLACEHOLDER)
+    cached = CachedPage(body, mimetype)
+    page_cache.set(key, cached, tags=models)
+    return cached
+
+
+def _store_when_complete(chunks, key, mimetype, nonce, models):
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk)
+            yield chunk
+        # Só chega aqui se a resposta inteira foi enviada (sem desconexão/erro)
+        _store(key, ''.join(parts), mimetype, nonce, models)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def cached_page(*models, params=()):
+    """Decorator: serve o HTML guardado; invalida quando algum dos modelos muda.
+
+    `params` são os parâmetros da query string que a view lê; os demais são
+    ignorados na chave, então o template não deve depender deles.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or not current_app.config.get('PAGE_CACHE_ENABLED'):
+                return view(*args, **kwargs)
+
+            key = page_cache_key(params)
+            nonce = g.get('csp_nonce') or ''
+            cached = page_cache.get(key)
+            if cached is not None:
+                if cached.reusable:
+                    g.cached_page = cached
+                return current_app.response_class(cached.body.replace(NONCE_PLACEHOLDER, nonce),
+                                                  mimetype=cached.mimetype)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or 'Set-Cookie' in response.headers:
+                return response
+            if response.is_streamed:
+                # stream_template: guarda o HTML quando o último pedaço tiver saído
+                response.response = _store_when_complete(response.response, key, response.mimetype, nonce, models)
+                return response
+            cached = _store(key, response.get_data(as_text=True), response.mimetype, nonce, models)
+            if cached.reusable:
+                g.cached_page = cached
+            return response
+        return wrapper
+    return decorator
+
+
+# GET condicional (ETag / Last-Modified)
+# =====================================
+
+def _templates_mtime(app):
+    """Data do template mais recente: um deploy com layout novo muda os validadores."""
+    latest = 0
+    for root, _dirs, files in os.walk(os.path.join(app.root_path, app.template_folder)):
+        for name in files:
+            latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+    return datetime.fromtimestamp(int(latest), timezone.utc)
+
+
+def _as_utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def _stamps_modified(models):
+    stamps = [mtime for mtime in content_versions.stamps(models).values() if mtime] if models else []
+    return datetime.fromtimestamp(max(stamps) // 1_000_000_000, timezone.utc) if stamps else None
+
+
+def conditional(validator, *models):
+    """Decorator: responde 304 quando o cliente já tem a versão atual da página.
+
+    `validator(**view_args)` devolve `(ultima_alteracao, marcador)` das linhas
+    exibidas, ou None quando não há o que validar (a view segue normalmente).
+    `models` são os modelos exibidos: o Last-Modified usa a marca deles, porque
+    o max(updated_at) volta para trás quando um post é despublicado ou excluído
+    e o If-Modified-Since daria um 304 falso.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            version = validator(**kwargs)
+            if version is None:
+                return view(*args, **kwargs)
+
+            modified, token = version
+            templates_mtime = current_app.extensions.get('templates_mtime')
+            last_modified = max(filter(None, (_as_utc(modified), templates_mtime, _stamps_modified(models))),
+                                default=None)
+            etag = hashlib.sha1(repr((
+                request.endpoint,
+                sorted(kwargs.items()),
+                sorted(request.args.items(multi=True)),
+                modified,
+                templates_mtime,
+                token,
+            )).encode()).hexdigest()[:20]
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = bool(since and last_modified and last_modified <= since)
+
+            if not_modified:
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            if last_modified:
+                response.last_modified = last_modified
+            response.cache_control.public = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
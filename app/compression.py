@@ -0,0 +1,151 @@
+# app/compression.py
+"""Compressão das respostas dinâmicas (HTML, XML, JSON) com brotli ou gzip.
+
+A codificação é escolhida pelo `Accept-Encoding` (brotli tem preferência em
+caso de empate). Respostas em streaming são comprimidas pedaço a pedaço.
+Respostas pequenas, arquivos (send_file) e as que já têm `Content-Encoding`
+saem como estão; os assets do build e o sitemap gerado em segundo plano têm
+as próprias variantes .gz/.br (ver assets.py e send_precompressed).
+
+Páginas servidas pelo cache de páginas guardam os bytes comprimidos junto do
+HTML (CachedPage.encoded): cada variante é comprimida uma única vez, com
+nível mais alto, e reaproveitada até o cache ser invalidado.
+"""
+import gzip
+import os
+import zlib
+
+from flask import current_app, g, request, send_file
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli é opcional
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'text/html', 'text/plain', 'text/css', 'text/xml', 'application/xml',
+    'application/json', 'application/ld+json', 'application/javascript', 'image/svg+xml',
+}
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+# (gzip, brotli): rápido por requisição; mais forte quando o resultado é guardado
+DYNAMIC_LEVELS = (6, 5)
+CACHED_LEVELS = (9, 9)
+
+
+def compress(data, encoding, cached=False):
+    gzip_level, brotli_quality = CACHED_LEVELS if cached else DYNAMIC_LEVELS
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def _as_bytes(chunk):
+    return chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+
+def compress_stream(chunks, encoding):
+    """Comprime uma resposta em streaming, liberando cada pedaço assim que chega."""
+    try:
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=DYNAMIC_LEVELS[1])
+            for chunk in chunks:
+                yield compressor.process(_as_bytes(chunk)) + compressor.flush()
+            yield compressor.finish()
+        else:
+            compressor = zlib.compressobj(DYNAMIC_LEVELS[0], zlib.DEFLATED, 31)  # 31: formato gzip
+            for chunk in chunks:
+                yield compressor.compress(_as_bytes(chunk)) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            yield compressor.flush()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def negotiate_encoding():
+    """'br', 'gzip' ou None conforme o Accept-Encoding da requisição."""
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def write_precompressed(path, data, mtime_ns):
+    """Grava as variantes .br/.gz de `path` com o mesmo mtime do original."""
+    for encoding in (['br', 'gzip'] if brotli is not None else ['gzip']):
+        variant = path + ENCODING_SUFFIXES[encoding]
+        with open(f'{variant}.tmp', 'wb') as fh:
+            fh.write(compress(data, encoding, cached=True))
+        os.utime(f'{variant}.tmp', ns=(mtime_ns, mtime_ns))
+        os.replace(f'{variant}.tmp', variant)
+
+
+def send_precompressed(path, mimetype):
+    """send_file usando a variante .br/.gz gravada junto do arquivo, se atual."""
+    encoding = negotiate_encoding()
+    variant = path + ENCODING_SUFFIXES[encoding] if encoding else None
+    try:
+        current = variant and os.stat(variant).st_mtime_ns == os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        current = False
+    if current:
+        response = send_file(variant, mimetype=mimetype, conditional=False, etag=False)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_file(path, mimetype=mimetype, conditional=False, etag=False)
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+class Compression:
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.after_request(self._compress)
+
+    def _compress(self, response):
+        cached_page = g.pop('cached_page', None)
+        if response.status_code == 304 and current_app.config['COMPRESS_ENABLED']:
+            response.vary.add('Accept-Encoding')  # mesmo Vary que a resposta 200 teria
+            return response
+        if (not current_app.config['COMPRESS_ENABLED']
+                or request.method == 'HEAD'
+                or response.status_code != 200
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        if response.is_streamed:
+            # Tamanho desconhecido: comprime pedaço a pedaço (stream_template, sitemap)
+            response.vary.add('Accept-Encoding')
+            encoding = negotiate_encoding()
+            if encoding is not None:
+                response.response = compress_stream(response.response, encoding)
+                response.headers['Content-Encoding'] = encoding
+                response.headers.pop('Content-Length', None)
+            return response
+
+        data = response.get_data()
+        if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+            return response
+        # A partir daqui o corpo depende do Accept-Encoding, mesmo sem compressão
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return response
+
+        if cached_page is not None:
+            compressed = cached_page.encoded.get(encoding)
+            if compressed is None:
+                compressed = cached_page.encoded[encoding] = compress(data, encoding, cached=True)
+        else:
+            compressed = compress(data, encoding)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            # ETag forte identifica os bytes: cada codificação precisa do seu
+            response.set_etag(f'{etag}-{encoding}')
+        return response
+
+
+compression = Compression()
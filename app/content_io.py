@@ -0,0 +1,264 @@
+# app/content_io.py
+"""Exportação/importação de conteúdo em JSONL (`flask content export|import`).
+
+Cada linha é um objeto com `type` (usuario, post, evento, depoimento) e os
+campos do registro. Posts referenciam o autor pelo username, para que o
+arquivo possa ser levado entre ambientes com ids diferentes.
+
+A exportação lê em lotes pelo id e a importação acumula lotes de linhas e
+grava com um único INSERT ... ON CONFLICT DO UPDATE (executemany) por lote;
+em ambos os casos a memória usada não depende do tamanho do arquivo.
+Chaves do upsert: post → slug, usuario → username, evento/depoimento → id.
+"""
+import json
+import secrets
+from datetime import datetime, timezone
+
+import bleach
+from sqlalchemy import func, select
+from werkzeug.security import generate_password_hash
+
+from . import db
+from .cache import invalidate_models
+from .models import Depoimento, Evento, Post, Usuario
+
+CONTENT_TYPES = ('usuario', 'post', 'evento', 'depoimento')
+MODELS = {'usuario': Usuario, 'post': Post, 'evento': Evento, 'depoimento': Depoimento}
+FIELDS = {
+    'usuario': ['username', 'email', 'is_active', 'date_created', 'last_login'],
+    'post': ['slug', 'title', 'summary', 'content', 'date_posted', 'is_published'],
+    'evento': ['id', 'title', 'description', 'event_date', 'location', 'registration_link', 'is_active'],
+    'depoimento': ['id', 'quote', 'author', 'is_visible'],
+}
+DATETIME_FIELDS = {'date_created', 'last_login', 'date_posted', 'event_date'}
+UPSERT_KEYS = {'usuario': 'username', 'post': 'slug', 'evento': 'id', 'depoimento': 'id'}
+
+
+class ContentImportError(ValueError):
+    """Linha inválida no arquivo de importação."""
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _serialize(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+# Exportação
+# ==========
+
+def _batches(query, id_column, batch_size):
+    """Percorre a consulta em lotes pelo id (keyset), sem OFFSET."""
+    last_id = None
+    while True:
+        batch = query if last_id is None else query.where(id_column > last_id)
+        rows = db.session.execute(batch.order_by(id_column).limit(batch_size)).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def export_content(fh, types=CONTENT_TYPES, include_passwords=False, batch_size=1000, progress=None):
+    """Escreve os registros em `fh` (JSONL) e devolve {tipo: quantidade}."""
+    counts = {}
+    for content_type in CONTENT_TYPES:
+        if content_type not in types:
+            continue
+        model = MODELS[content_type]
+        table = model.__table__
+        fields = list(FIELDS[content_type])
+        if content_type == 'usuario' and include_passwords:
+            fields.append('password_hash')
+        columns = [table.c[field] for field in fields if field != 'id']
+        if content_type == 'post':
+            query = (select(table.c.id, *columns, Usuario.__table__.c.username.label('author'))
+                     .join(Usuario.__table__, Usuario.__table__.c.id == table.c.author_id))
+            fields.append('author')
+        else:
+            query = select(table.c.id, *columns)
+
+        counts[content_type] = 0
+        for rows in _batches(query, table.c.id, batch_size):
+            for row in rows:
+                record = {'type': content_type}
+                record.update((field, _serialize(getattr(row, field))) for field in fields)
+                fh.write(json.dumps(record, ensure_ascii=False) + '\n')
+            counts[content_type] += len(rows)
+            if progress:
+                progress(content_type, counts[content_type])
+    return counts
+
+
+# Importação
+# ==========
+
+def _insert(table):
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f'Dialeto não suportado: {dialect}')
+    return insert(table)
+
+
+def _upsert(table, key, rows, exclude_from_update=()):
+    # Todas as linhas de um executemany precisam ter as mesmas colunas: um
+    # comando por conjunto de campos presentes. Campo ausente no registro usa o
+    # default da coluna no INSERT e não é sobrescrito no UPDATE.
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+    for columns, group in groups.items():
+        stmt = _insert(table)
+        updates = {column: stmt.excluded[column] for column in columns
+                   if column != key and column not in exclude_from_update}
+        if updates:
+            stmt = stmt.on_conflict_do_update(index_elements=[key], set_=updates)
+        else:  # só a chave (ex.: usuário sem outros campos): nada a atualizar
+            stmt = stmt.on_conflict_do_nothing(index_elements=[key])
+        db.session.execute(stmt, group)
+
+
+class ContentImporter:
+    """Acumula as linhas em lotes por tipo e grava cada lote com um upsert."""
+
+    def __init__(self, batch_size=1000, progress=None):
+        from .admin_routes import ALLOWED_ATTRIBUTES, ALLOWED_TAGS
+
+        self.batch_size = batch_size
+        self.progress = progress
+        self.pending = {content_type: [] for content_type in CONTENT_TYPES}
+        self.counts = dict.fromkeys(CONTENT_TYPES, 0)
+        self.authors = {}
+        # Mesmas regras do sanitize_html do admin, com um Cleaner reaproveitado
+        self.cleaner = bleach.Cleaner(tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True)
+
+    def _author_id(self, username):
+        if username not in self.authors:
+            self.authors[username] = db.session.execute(
+                select(Usuario.id).where(Usuario.username == username)
+            ).scalar()
+        if self.authors[username] is None:
+            raise ContentImportError(f'autor inexistente: {username!r} (importe os usuários antes)')
+        return self.authors[username]
+
+    def _row(self, record, line_number):
+        content_type = record.get('type')
+        if content_type not in CONTENT_TYPES:
+            raise ContentImportError(f'linha {line_number}: tipo inválido {content_type!r}')
+        row = {}
+        for field in FIELDS[content_type]:
+            value = record.get(field)
+            if field not in record or (field == 'id' and value is None):
+                continue
+            if field in DATETIME_FIELDS and value:
+                try:
+                    value = datetime.fromisoformat(value)
+                except (TypeError, ValueError) as exc:
+                    raise ContentImportError(f'linha {line_number}: {field} inválido ({value!r})') from exc
+            row[field] = value
+        key = UPSERT_KEYS[content_type]
+        if key != 'id' and not row.get(key):
+            raise ContentImportError(f'linha {line_number}: {content_type} sem {key}')
+
+        if content_type == 'usuario':
+            if record.get('password_hash'):
+                row['password_hash'] = record['password_hash']
+            else:
+                # Usuário novo recebe uma senha aleatória (precisa ser resetada);
+                # o existente mantém a senha atual
+                row['password_hash'] = generate_password_hash(secrets.token_urlsafe(24))
+                row['_keep_password'] = True
+        else:
+            row['updated_at'] = _now()
+        if content_type == 'post':
+            row['content'] = self.cleaner.clean(row.get('content') or '')
+            row['author'] = record.get('author')
+        return content_type, row
+
+    def add(self, record, line_number=None):
+        content_type, row = self._row(record, line_number)
+        self.pending[content_type].append(row)
+        if len(self.pending[content_type]) >= self.batch_size:
+            self.flush(content_type)
+
+    def flush(self, content_type=None):
+        for current in [content_type] if content_type else CONTENT_TYPES:
+            if current == 'post' and self.pending['usuario']:
+                self.flush('usuario')  # autores precisam existir antes dos posts
+            rows = self.pending[current]
+            if not rows:
+                continue
+            table = MODELS[current].__table__
+            if current == 'usuario':
+                keep, replace = [], []
+                for row in rows:
+                    (keep if row.pop('_keep_password', False) else replace).append(row)
+                if keep:
+                    _upsert(table, 'username', keep, exclude_from_update=('password_hash',))
+                if replace:
+                    _upsert(table, 'username', replace)
+            elif current == 'post':
+                for row in rows:
+                    row['author_id'] = self._author_id(row.pop('author'))
+                _upsert(table, 'slug', rows)
+            else:
+                with_id = [row for row in rows if 'id' in row]
+                if with_id:
+                    _upsert(table, 'id', with_id)
+                if len(with_id) < len(rows):
+                    db.session.execute(table.insert(), [row for row in rows if 'id' not in row])
+            db.session.commit()
+            if current == 'usuario':
+                # Senha trocada muda a session_version (ver Usuario.get_id): derruba
+                # os retratos em cache já, sem esperar o fim da importação
+                invalidate_models(Usuario)
+            self.counts[current] += len(rows)
+            self.pending[current] = []
+            if self.progress:
+                self.progress(current, self.counts[current])
+
+    def finish(self):
+        self.flush()
+        _fix_sequences()
+        invalidate_models(*MODELS.values())
+        return self.counts
+
+
+def _fix_sequences():
+    # Ids explícitos (evento/depoimento) não avançam as sequences do PostgreSQL
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    for model in (Evento, Depoimento):
+        table = model.__tablename__
+        db.session.execute(
+            select(func.setval(func.pg_get_serial_sequence(table, 'id'),
+                               func.coalesce(func.max(model.id), 0) + 1, False))
+        )
+    db.session.commit()
+
+
+def import_content(fh, batch_size=1000, progress=None):
+    """Lê JSONL de `fh` e faz upsert em lotes; devolve {tipo: quantidade}."""
+    from .search import rebuild_index
+
+    importer = ContentImporter(batch_size=batch_size, progress=progress)
+    for line_number, line in enumerate(fh, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise ContentImportError(f'linha {line_number}: JSON inválido ({exc})') from exc
+        importer.add(record, line_number)
+    counts = importer.finish()
+    if counts['post']:
+        # Upserts em lote não passam pelo after_flush do índice de busca
+        rebuild_index()
+    return counts
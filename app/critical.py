@@ -0,0 +1,252 @@
+# app/critical.py
+"""CSS crítico por template, inline no <head>, com o CSS completo assíncrono.
+
+`flask assets critical` renderiza as páginas públicas, considera "acima da
+dobra" tudo o que vem antes do conteúdo (cabeçalho, menu mobile) mais a
+primeira seção do <main>, e guarda em static/dist/critical.json, por
+template, apenas as regras de STYLESHEETS cujos seletores casam com esses
+elementos (BeautifulSoup + soupsieve).
+
+No layout, `stylesheets()` emite esse CSS num <style> (a CSP já libera
+estilos inline em style-src) e carrega os arquivos completos com
+media="print"; o js/async-css.js troca para media="all" quando chegam, já que
+a CSP bloqueia o `onload` inline. Templates sem CSS crítico recebem os
+<link> normais.
+"""
+import json
+import os
+import re
+
+from flask import before_render_template, g, url_for
+from markupsafe import Markup
+from sqlalchemy.exc import SQLAlchemyError
+
+try:
+    from bs4 import BeautifulSoup
+    from soupsieve import SelectorSyntaxError
+except ImportError:  # pragma: no cover - BeautifulSoup só é necessário no build
+    BeautifulSoup = SelectorSyntaxError = None
+
+from .assets import DIST_DIR, minify_css
+from .metrics import SKIP_ENVIRON_KEY
+
+# Folhas de estilo do layout público (base.html)
+STYLESHEETS = ('css/style.css', 'css/public.css')
+MANIFEST_NAME = 'critical.json'
+# Páginas renderizadas no build; blog_post usa o post publicado mais recente
+PAGES = ('main.home', 'main.blog_list', 'main.blog_post', 'main.eventos_public', 'main.casamento_crise')
+# Acima disso o CSS crítico não cabe na primeira ida e volta do TCP (~14 KB)
+MAX_SIZE = 14 * 1024
+
+_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+# Estados e pseudo-elementos não existem no HTML estático: ignorados na comparação
+_DYNAMIC_PSEUDO = re.compile(
+    r'::?(?:before|after|placeholder|selection|marker|backdrop|-webkit-[\w-]+|-moz-[\w-]+'
+    r'|hover|focus|focus-visible|focus-within|active|visited|target)\b(?:\([^)]*\))?')
+_ANIMATION = re.compile(r'animation(?:-name)?\s*:\s*([^;}]+)')
+
+
+# Parser mínimo de CSS (regras, @media/@supports aninhados)
+# ==========================================================
+
+def _closing_brace(source, index):
+    level = 0
+    for cursor in range(index, len(source)):
+        level += {'{': 1, '}': -1}.get(source[cursor], 0)
+        if level == 0:
+            return cursor
+    return len(source)
+
+
+def _parse_block(source, index, nested=False):
+    rules, start = [], index
+    while index < len(source):
+        char = source[index]
+        if char == '}':
+            if nested:
+                return rules, index + 1
+            start = index + 1  # chave sobrando no nível de cima: ignorada
+        if char == '{':
+            prelude = source[start:index].strip()
+            if prelude.startswith(('@media', '@supports')):
+                children, index = _parse_block(source, index + 1, nested=True)
+                rules.append((prelude, children))
+            else:
+                end = _closing_brace(source, index)
+                rules.append((prelude, source[index + 1:end].strip()))
+                index = end + 1
+            start = index
+            continue
+        if char == ';' and source[start:index].strip().startswith('@'):  # @charset, @import
+            start = index + 1
+        index += 1
+    return rules, index
+
+
+def parse_css(source):
+    """[(prelúdio, corpo)]; em @media/@supports o corpo é a lista de regras internas."""
+    return _parse_block(_COMMENT.sub('', source), 0)[0]
+
+
+def _split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for index, char in enumerate(prelude):
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if char == ',' and depth == 0:
+            selectors.append(prelude[start:index])
+            start = index + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def _matches(prelude, soup):
+    for selector in _split_selectors(prelude):
+        selector = _DYNAMIC_PSEUDO.sub('', selector).strip() or '*'
+        try:
+            if soup.select_one(selector) is not None:
+                return True
+        except SelectorSyntaxError:
+            return True  # na dúvida, a regra fica
+    return False
+
+
+def _critical_rules(rules, soup, animations):
+    kept = []
+    for prelude, body in rules:
+        if isinstance(body, list):
+            inner = _critical_rules(body, soup, animations)
+            if inner:
+                kept.append(f'{prelude}{{{"".join(inner)}}}')
+        elif prelude.startswith('@'):
+            continue  # @keyframes entram depois, se usados; @font-face vêm do fonts.css
+        elif _matches(prelude, soup):
+            kept.append(f'{prelude}{{{body}}}')
+            for value in _ANIMATION.findall(body):
+                animations.update(value.replace(',', ' ').split())
+    return kept
+
+
+def above_the_fold(html):
+    """Documento reduzido ao que aparece antes da rolagem."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup.select('script, noscript, body > footer'):
+        tag.decompose()
+    main = soup.find('main')
+    if main is not None:
+        for section in main.find_all(recursive=False)[1:]:
+            section.decompose()
+    return soup
+
+
+def critical_css(rules, html):
+    """Regras de `rules` usadas pelo trecho acima da dobra de `html`, minificadas."""
+    soup = above_the_fold(html)
+    animations = set()
+    kept = _critical_rules(rules, soup, animations)
+    for prelude, body in rules:
+        if prelude.startswith(('@keyframes', '@-webkit-keyframes')) and prelude.split()[-1] in animations:
+            kept.append(f'{prelude}{{{body}}}')
+    return minify_css(''.join(kept))
+
+
+# Build
+# =====
+
+def _page_url(endpoint):
+    if endpoint == 'main.blog_post':
+        from .models import Post
+        slug = Post.query.filter_by(is_published=True).order_by(Post.date_posted.desc()).with_entities(Post.slug).scalar()
+        return url_for(endpoint, slug=slug) if slug else None
+    return url_for(endpoint)
+
+
+def build_critical(app):
+    """Calcula o CSS crítico de cada template de PAGES e grava o critical.json."""
+    if BeautifulSoup is None:
+        raise RuntimeError('beautifulsoup4 não instalado: pip install beautifulsoup4')
+    from .assets import assets
+
+    sources = []
+    for name in STYLESHEETS:
+        # A versão do build já tem os url() absolutos
+        with open(os.path.join(app.static_folder, assets.manifest.get(name, name)), encoding='utf-8') as fh:
+            sources.append(fh.read())
+    rules = parse_css('\n'.join(sources))
+
+    manifest, skipped = {}, []
+    client = app.test_client()
+    page_cache_enabled = app.config['PAGE_CACHE_ENABLED']
+    app.config['PAGE_CACHE_ENABLED'] = False  # a página precisa ser renderizada
+    try:
+        for endpoint in PAGES:
+            try:
+                with app.test_request_context():
+                    url = _page_url(endpoint)
+            except SQLAlchemyError:
+                url = None  # banco indisponível no build: o template fica sem CSS crítico
+            if url is None:
+                skipped.append(endpoint)
+                continue
+            templates = []
+
+            def record(sender, template, context, **extra):
+                templates.append(template.name)
+
+            with before_render_template.connected_to(record, app):
+                response = client.get(url, environ_overrides={SKIP_ENVIRON_KEY: True})
+                html = response.get_data(as_text=True)
+            if response.status_code != 200 or not templates:
+                skipped.append(endpoint)
+                continue
+            manifest[templates[0]] = critical_css(rules, html)
+    finally:
+        app.config['PAGE_CACHE_ENABLED'] = page_cache_enabled
+
+    path = os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    return manifest, skipped
+
+
+def load_critical_manifest(app):
+    try:
+        with open(os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME), encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+class CriticalCSS:
+    """Helper de template `stylesheets()` baseado no critical.json."""
+
+    def __init__(self):
+        self.manifest = {}
+
+    def init_app(self, app):
+        self.manifest = load_critical_manifest(app)
+        app.jinja_env.globals['stylesheets'] = self.stylesheets
+        before_render_template.connect(self._remember_template, app)
+
+    @staticmethod
+    def _remember_template(sender, template, context, **extra):
+        # O primeiro template renderizado é o da página (os demais são includes/layout)
+        if 'page_template' not in g:
+            g.page_template = template.name
+
+    def stylesheets(self):
+        """CSS crítico inline + STYLESHEETS assíncronos, ou os <link> normais."""
+        hrefs = [url_for('static', filename=name) for name in STYLESHEETS]
+        critical = self.manifest.get(g.get('page_template'))
+        if not critical:
+            return Markup('\n'.join(f'<link rel="stylesheet" href="{href}">' for href in hrefs))
+        critical = critical.replace('</', '<\\/')  # não fecha o <style> antes da hora
+        links = [f'<style>{critical}</style>']
+        links += [f'<link rel="preload" href="{href}" as="style">' for href in hrefs]
+        links += [f'<link rel="stylesheet" href="{href}" media="print" data-async-css>' for href in hrefs]
+        links.append('<noscript>' + ''.join(f'<link rel="stylesheet" href="{href}">' for href in hrefs) + '</noscript>')
+        links.append(f'<script src="{url_for("static", filename="js/async-css.js")}" async></script>')
+        return Markup('\n'.join(links))
+
+
+critical = CriticalCSS()
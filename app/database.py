@@ -0,0 +1,295 @@
+# app/database.py
+"""Perfis do engine SQLAlchemy por banco (DB_ENGINE_PROFILE) e estatísticas do pool.
+
+- sqlite: cada conexão nova recebe journal_mode=WAL (leitores não bloqueiam
+  o escritor e vice-versa), synchronous=NORMAL, mmap, cache e busy_timeout,
+  para que vários workers do gunicorn esperem a vez de escrever em vez de
+  falhar com "database is locked". Sem pre-ping nem reciclagem: não há
+  conexão de rede para cair.
+- postgresql: pool do tamanho das threads do worker (+1 para a trava do
+  agendador), com pool + overflow limitados por DB_MAX_CONNECTIONS dividido
+  entre os workers (sem a variável, 80% do max_connections do servidor),
+  statement_timeout e keepalive TCP no lugar do pre-ping a cada checkout.
+- legacy: as opções antigas (pool_recycle=300, pool_pre_ping) para qualquer
+  banco.
+- auto (padrão): sqlite ou postgresql conforme a DATABASE_URL; outros bancos
+  usam legacy.
+
+Conexões abertas, checkouts e checkouts além do pool_size vão para os
+contadores de metrics.py; o estado atual do pool do worker aparece em
+/admin/metricas e em /metrics.
+"""
+import math
+import os
+
+from sqlalchemy import event
+
+from . import db
+from .metrics import metrics
+
+PROFILES = ('auto', 'sqlite', 'postgresql', 'legacy')
+LEGACY_OPTIONS = {'pool_recycle': 300, 'pool_pre_ping': True}
+
+
+# Fração do max_connections do PostgreSQL usada pelos workers quando DB_MAX_CONNECTIONS
+# não é informado; o resto fica para a API ASGI, migrações e acesso manual
+SERVER_CONNECTION_SHARE = 0.8
+POSTGRES_DEFAULT_MAX_CONNECTIONS = 100
+# Sem WEB_CONCURRENCY, nunca mais workers que isso: cada um tem seus caches, pool e agendador
+MAX_DEFAULT_WORKERS = 4
+
+
+def _cgroup_cpu_limit():
+    """Cota de CPU do container (cgroup v2, depois v1), ou None se não houver."""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as fh:
+            quota, period = fh.read().split()[:2]
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as fh:
+            quota = int(fh.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as fh:
+            period = int(fh.read())
+    except (OSError, ValueError):
+        return None
+    return quota / period if quota > 0 and period > 0 else None
+
+
+def _cores():
+    try:
+        # Afinidade não reflete a cota do cgroup (no Railway mostra os núcleos do host)
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit:
+        cores = min(cores, max(1, math.ceil(limit)))
+    return cores
+
+
+def web_concurrency():
+    """Workers do gunicorn (WEB_CONCURRENCY ou 2 × núcleos + 1, até MAX_DEFAULT_WORKERS)."""
+    if os.environ.get('WEB_CONCURRENCY'):
+        return int(os.environ['WEB_CONCURRENCY'])
+    return min(2 * _cores() + 1, MAX_DEFAULT_WORKERS)
+
+
+def gunicorn_threads():
+    return int(os.environ.get('GUNICORN_THREADS', 2))
+
+
+def resolve_profile(profile, url):
+    if profile and profile != 'auto':
+        if profile not in PROFILES:
+            raise RuntimeError(f'DB_ENGINE_PROFILE inválido: {profile} (use {", ".join(PROFILES)})')
+        return profile
+    if url.startswith('sqlite'):
+        return 'sqlite'
+    if url.startswith('postgresql'):
+        return 'postgresql'
+    return 'legacy'
+
+
+def _in_memory(url):
+    return url in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in url
+
+
+def pool_sizes(config):
+    """(pool_size, max_overflow) por worker."""
+    threads = gunicorn_threads()
+    size = config.get('DB_POOL_SIZE') or threads + 1
+    overflow = config.get('DB_MAX_OVERFLOW')
+    overflow = threads if overflow is None else overflow
+    max_connections = config.get('DB_MAX_CONNECTIONS')
+    if max_connections:
+        # Reserva do servidor dividida entre os workers (as conexões da API ASGI ficam de fora)
+        budget = max(1, max_connections // web_concurrency())
+        size = min(size, budget)
+        overflow = max(0, min(overflow, budget - size))
+    return size, overflow
+
+
+def server_connection_limit(url):
+    """max_connections − superuser_reserved_connections do servidor, ou None se inacessível."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.exc import SQLAlchemyError
+    from sqlalchemy.pool import NullPool
+
+    engine = create_engine(url, poolclass=NullPool, connect_args={'connect_timeout': 5})
+    try:
+        with engine.connect() as connection:
+            limit = int(connection.exec_driver_sql('SHOW max_connections').scalar())
+            reserved = int(connection.exec_driver_sql('SHOW superuser_reserved_connections').scalar())
+        return limit - reserved
+    except SQLAlchemyError:
+        return None
+    finally:
+        engine.dispose()
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS do perfil configurado."""
+    profile = resolve_profile(config.get('DB_ENGINE_PROFILE'), config['SQLALCHEMY_DATABASE_URI'])
+    if profile == 'legacy':
+        return dict(LEGACY_OPTIONS)
+    if profile == 'sqlite' and _in_memory(config['SQLALCHEMY_DATABASE_URI']):
+        return {}  # SingletonThreadPool: sem pool_size/overflow
+    size, overflow = pool_sizes(config)
+    options = {
+        'pool_size': size,
+        'max_overflow': overflow,
+        'pool_timeout': config.get('DB_POOL_TIMEOUT', 10),
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', False),
+    }
+    if profile == 'sqlite':
+        return options
+    connect_options = ['-c application_name=cpi-web']
+    if config.get('DB_STATEMENT_TIMEOUT'):
+        connect_options.append(f'-c statement_timeout={config["DB_STATEMENT_TIMEOUT"]}')
+    if config.get('DB_IDLE_IN_TRANSACTION_TIMEOUT'):
+        connect_options.append(f'-c idle_in_transaction_session_timeout={config["DB_IDLE_IN_TRANSACTION_TIMEOUT"]}')
+    options.update(
+        pool_recycle=config.get('DB_POOL_RECYCLE', 300),
+        # Mantém poucas conexões quentes; as ociosas envelhecem e são recicladas
+        pool_use_lifo=True,
+        connect_args={
+            'options': ' '.join(connect_options),
+            # Conexão derrubada pelo proxy é detectada pelo TCP, sem SELECT 1 a cada checkout
+            'keepalives': 1,
+            'keepalives_idle': 30,
+            'keepalives_interval': 10,
+            'keepalives_count': 3,
+        },
+    )
+    return options
+
+
+# Eventos do pool
+# ===============
+
+def _sqlite_pragmas(config):
+    pragmas = [
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f'PRAGMA busy_timeout={int(config.get("SQLITE_BUSY_TIMEOUT", 5000))}',
+        f'PRAGMA mmap_size={int(config.get("SQLITE_MMAP_SIZE", 64 * 1024 * 1024))}',
+        # Negativo: tamanho em KiB em vez de páginas
+        f'PRAGMA cache_size=-{int(config.get("SQLITE_CACHE_SIZE", 16 * 1024))}',
+        'PRAGMA temp_store=MEMORY',
+    ]
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+def _on_connect(dbapi_connection, connection_record):
+    metrics.increment('cpi_db_connections_total')
+
+
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    metrics.increment('cpi_db_connections_invalidated_total')
+
+
+def _overflow(pool):
+    # QueuePool.overflow() é negativo enquanto o pool_size ainda não foi todo aberto
+    return max(0, pool.overflow()) if hasattr(pool, 'overflow') else None
+
+
+def _checkout_counter(engine):
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.increment('cpi_db_checkouts_total')
+        if _overflow(engine.pool):  # engine.pool muda a cada dispose()
+            metrics.increment('cpi_db_overflow_checkouts_total')
+
+    return on_checkout
+
+
+class DatabaseProfile:
+    """Aplica o perfil ao engine do Flask-SQLAlchemy e informa o estado do pool."""
+
+    def __init__(self):
+        self.profile = None
+        self.app = None
+
+    def configure(self, app):
+        """Define SQLALCHEMY_ENGINE_OPTIONS; precisa rodar antes de db.init_app."""
+        app.config.setdefault('DB_ENGINE_PROFILE', 'auto')
+        self.profile = resolve_profile(app.config['DB_ENGINE_PROFILE'], app.config['SQLALCHEMY_DATABASE_URI'])
+        if self.profile == 'postgresql' and not app.config.get('DB_MAX_CONNECTIONS'):
+            # Consultado uma vez (no mestre, com preload_app); sem acesso, o padrão do PostgreSQL
+            limit = server_connection_limit(app.config['SQLALCHEMY_DATABASE_URI']) or POSTGRES_DEFAULT_MAX_CONNECTIONS
+            app.config['DB_MAX_CONNECTIONS'] = max(1, int(limit * SERVER_CONNECTION_SHARE))
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+
+    def init_app(self, app):
+        """Registra os eventos no engine já criado por db.init_app."""
+        self.app = app
+        with app.app_context():
+            engine = db.engine
+        if self.profile == 'sqlite':
+            event.listen(engine, 'connect', _sqlite_pragmas(app.config))
+        event.listen(engine, 'connect', _on_connect)
+        event.listen(engine, 'checkout', _checkout_counter(engine))
+        event.listen(engine, 'invalidate', _on_invalidate)
+        app.extensions['db_profile'] = self
+
+    def _engine(self):
+        with self.app.app_context():
+            return db.engine
+
+    def pool_status(self):
+        """Estado do pool deste worker + contadores somados entre os workers."""
+        engine = self._engine()
+        pool = engine.pool
+        status = {
+            'profile': self.profile,
+            'dialect': engine.dialect.name,
+            'pool': type(pool).__name__,
+            'workers': web_concurrency(),
+            'threads': gunicorn_threads(),
+        }
+        for field in ('size', 'checkedin', 'checkedout'):
+            method = getattr(pool, field, None)
+            status[field] = method() if method else None
+        status['overflow'] = _overflow(pool)
+        status['max_overflow'] = self.app.config['SQLALCHEMY_ENGINE_OPTIONS'].get('max_overflow')
+        counters = metrics.counters()
+        for name in ('connections', 'connections_invalidated', 'checkouts', 'overflow_checkouts'):
+            status[name] = counters.get(f'cpi_db_{name}_total', 0)
+        if self.profile == 'sqlite':
+            with engine.connect() as connection:
+                status['journal_mode'] = connection.exec_driver_sql('PRAGMA journal_mode').scalar()
+        return status
+
+    def prometheus(self):
+        # Medidas do worker que respondeu ao coletor (os contadores já vêm de metrics.py)
+        pool = self._engine().pool
+        status = {'size': pool.size() if hasattr(pool, 'size') else None,
+                  'checkedout': pool.checkedout() if hasattr(pool, 'checkedout') else None,
+                  'overflow': _overflow(pool)}
+        labels = f'pid="{os.getpid()}"'
+        lines = []
+        for name, field, help_text in (
+            ('cpi_db_pool_size', 'size', 'Conexões mantidas pelo pool'),
+            ('cpi_db_pool_checked_out', 'checkedout', 'Conexões em uso'),
+            ('cpi_db_pool_overflow', 'overflow', 'Conexões além do pool_size'),
+        ):
+            if status[field] is not None:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name}{{{labels}}} {status[field]}')
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+db_profile = DatabaseProfile()
@@ -0,0 +1,111 @@
+# app/explain.py
+"""Verificação dos planos de execução das consultas das rotas públicas.
+
+Em vez de manter uma cópia das consultas, as páginas públicas são requisitadas
+pelo test client com o cache de páginas desligado; cada SELECT emitido é
+capturado e passado por EXPLAIN (SQLite ou PostgreSQL). O relatório aponta
+varreduras sequenciais e ordenações que não usam índice.
+"""
+import json
+import re
+
+from sqlalchemy import event
+
+from . import db
+from .models import Post
+
+
+def _public_urls(client):
+    """URLs exercitadas: todas as rotas de routes.py que consultam o banco."""
+    urls = ['/', '/blog', '/eventos', '/sitemap.xml']
+    first_page = client.get('/blog').get_data(as_text=True)
+    cursor = re.search(r'[?&]cursor=([\w-]+)', first_page)
+    if cursor:
+        urls.append(f'/blog?cursor={cursor.group(1)}')
+    slug = db.session.query(Post.slug).filter_by(is_published=True).limit(1).scalar()
+    urls.append(f'/blog/{slug or "slug-inexistente"}')
+    return urls
+
+
+def capture_queries(app):
+    """Devolve {sql: (parâmetros, url)} dos SELECTs emitidos pelas rotas públicas."""
+    captured = {}
+    current_url = [None]
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and statement not in captured:
+            captured[statement] = (parameters, current_url[0])
+
+    enabled = app.config.get('PAGE_CACHE_ENABLED')
+    app.config['PAGE_CACHE_ENABLED'] = False
+    engine = db.engine
+    try:
+        with app.test_client() as client:
+            urls = _public_urls(client)
+            event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+            try:
+                for url in urls:
+                    current_url[0] = url
+                    client.get(url).get_data()
+            finally:
+                event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    finally:
+        app.config['PAGE_CACHE_ENABLED'] = enabled
+    return captured
+
+
+def _sqlite_problems(rows):
+    problems = []
+    for row in rows:
+        detail = row[-1]
+        if re.match(r'SCAN \w+$', detail):
+            problems.append(f'varredura sequencial: {detail}')
+        elif 'TEMP B-TREE' in detail:
+            problems.append(f'ordenação sem índice: {detail}')
+    return [row[-1] for row in rows], problems
+
+
+def _postgres_problems(plan):
+    lines, problems = [], []
+
+    def walk(node, depth=0):
+        label = node['Node Type']
+        if 'Relation Name' in node:
+            label += f" on {node['Relation Name']}"
+        if 'Index Name' in node:
+            label += f" using {node['Index Name']}"
+        lines.append('  ' * depth + label)
+        if node['Node Type'] == 'Seq Scan':
+            problems.append(f"varredura sequencial em {node['Relation Name']}")
+        elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+            problems.append(f"ordenação sem índice: {node.get('Sort Key')}")
+        for child in node.get('Plans', []):
+            walk(child, depth + 1)
+
+    walk(plan[0]['Plan'])
+    return lines, problems
+
+
+def explain_queries(app, seqscan_off=False):
+    """Roda EXPLAIN em cada consulta capturada e devolve uma lista de relatórios.
+
+    `seqscan_off` (PostgreSQL) desliga seq scans no planejador para verificar se
+    existe índice utilizável mesmo quando as tabelas ainda são pequenas.
+    """
+    dialect = db.engine.dialect.name
+    reports = []
+    for statement, (parameters, url) in capture_queries(app).items():
+        with db.engine.connect() as conn:
+            if dialect == 'sqlite':
+                rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+                plan, problems = _sqlite_problems(rows)
+            elif dialect == 'postgresql':
+                if seqscan_off:
+                    conn.exec_driver_sql('SET LOCAL enable_seqscan = off')
+                raw = conn.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters).scalar()
+                plan, problems = _postgres_problems(raw if isinstance(raw, list) else json.loads(raw))
+            else:
+                raise RuntimeError(f'Dialeto não suportado: {dialect}')
+            conn.rollback()
+        reports.append({'url': url, 'sql': statement, 'plan': plan, 'problems': problems})
+    return reports
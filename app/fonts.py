@@ -0,0 +1,333 @@
+# app/fonts.py
+"""Fontes e ícones servidos pelo próprio site, reduzidos ao que é usado.
+
+`flask fonts build` varre os templates e os CSS/JS de static/ atrás das
+classes do Font Awesome (`fa-instagram`, `fa-calendar`...) e dos pesos de
+fonte declarados, baixa as fontes originais (cdnjs e Google Fonts, com cópia
+local em FONTS_SOURCE_DIR) e grava em static/dist/fonts/:
+- arquivos WOFF2 com apenas os glifos usados (ícones) ou apenas o subset
+  latino e a faixa de pesos usada (Montserrat e Newsreader);
+- um CSS mínimo com os @font-face e as regras dos ícones usados;
+- o manifest fonts.json.
+
+O helper `font_links()` dos templates emite o preload das fontes de texto e
+o CSS gerado. Sem manifest, continua apontando para as CDNs (e a CSP de
+create_app libera essas origens).
+"""
+import hashlib
+import io
+import json
+import os
+import posixpath
+import re
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit
+
+from flask import url_for
+from markupsafe import Markup
+
+try:
+    from fontTools import subset as ft_subset
+    from fontTools.ttLib import TTFont
+    from fontTools.varLib import instancer
+except ImportError:  # pragma: no cover - fontTools só é necessário no build
+    ft_subset = TTFont = instancer = None
+
+from .assets import DIST_DIR, assets, minify_css, _write
+from .compression import write_precompressed
+
+FONTS_DIR = 'fonts'
+MANIFEST_NAME = 'fonts.json'
+
+FONT_AWESOME_URL = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.5.2'
+FONT_AWESOME_INTEGRITY = 'sha512-SnH5WK+bZxgPHs44uWIX+LLJAJ9/2PkPKZ5QiAj6Ta86w+fsb2TkcmfRyVX3pBnMFcV7oQPJkl9QevSCWr3W6A=='
+# (arquivo, família CSS, peso)
+FONT_AWESOME_FACES = [
+    ('fa-solid-900', 'Font Awesome 6 Free', 900),
+    ('fa-regular-400', 'Font Awesome 6 Free', 400),
+    ('fa-brands-400', 'Font Awesome 6 Brands', 400),
+]
+FONT_AWESOME_STYLES = {'fa', 'fa-solid', 'fa-regular', 'fa-brands', 'fas', 'far', 'fab', 'fa-classic'}
+FONT_AWESOME_BASE_CSS = """
+.fa,.fa-solid,.fa-regular,.fa-brands,.fas,.far,.fab{-moz-osx-font-smoothing:grayscale;
+-webkit-font-smoothing:antialiased;display:var(--fa-display,inline-block);font-style:normal;
+font-variant:normal;line-height:1;text-rendering:auto}
+.fa,.fa-solid,.fas{font-family:"Font Awesome 6 Free";font-weight:900}
+.fa-regular,.far{font-family:"Font Awesome 6 Free";font-weight:400}
+.fa-brands,.fab{font-family:"Font Awesome 6 Brands";font-weight:400}
+"""
+
+GOOGLE_FONTS_URL = 'https://fonts.googleapis.com/css2'
+# Família: (faixa de pesos disponível, tem itálico, eixos extras da URL)
+FAMILIES = {
+    'Montserrat': ((400, 700), False, ''),
+    'Newsreader': ((200, 800), True, '6..72'),
+}
+# Português cabe no subset "latin" do Google Fonts
+SUBSETS = ('latin',)
+# Sem User-Agent de navegador moderno o Google Fonts responde com TTF
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36'
+FETCH_TIMEOUT = 30  # segundos por download
+
+# Origens liberadas na CSP enquanto as fontes vêm das CDNs
+CDN_ORIGINS = {
+    'style-src': ['https://fonts.googleapis.com', 'https://cdnjs.cloudflare.com'],
+    'font-src': ['https://fonts.gstatic.com', 'https://cdnjs.cloudflare.com'],
+}
+CDN_LINKS = (
+    '<link rel="preconnect" href="https://fonts.googleapis.com">\n'
+    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n'
+    '<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Newsreader:ital,opsz,wght@'
+    '0,6..72,200..800;1,6..72,200..800&amp;family=Montserrat:wght@400;500;600;700&amp;display=swap">'
+)
+
+SCANNED_EXTENSIONS = ('.html', '.xml', '.css', '.js')
+_FA_CLASS = re.compile(r'\bfa-[a-z0-9]+(?:-[a-z0-9]+)*\b')
+_FONT_WEIGHT = re.compile(r'font-weight\s*:\s*(\d{3}|bold|normal)', re.I)
+_FONT_SHORTHAND = re.compile(r'\bfont\s*:\s*(?:italic\s+)?(\d{3})\b', re.I)
+_ITALIC = re.compile(r'font-style\s*:\s*italic', re.I)
+_ICON_RULE = re.compile(r'\.(fa-[a-z0-9-]+)::?before')
+_CONTENT = re.compile(r'content\s*:\s*"\\([0-9a-f]+)"', re.I)
+_FONT_FACE = re.compile(r'/\*\s*([\w-]+)\s*\*/\s*@font-face\s*\{([^}]*)\}')
+_DESCRIPTOR = re.compile(r'([\w-]+)\s*:\s*([^;]+);')
+_FACE_URL = re.compile(r'url\(([^)]+)\)')
+
+
+# Varredura
+# =========
+
+def _scanned_files(app):
+    roots = [os.path.join(app.root_path, app.template_folder)]
+    roots += [os.path.join(app.static_folder, name) for name in ('css', 'js')]
+    for root in roots:
+        for directory, _dirs, files in os.walk(root):
+            for name in sorted(files):
+                if name.endswith(SCANNED_EXTENSIONS):
+                    yield os.path.join(directory, name)
+
+
+def scan_usage(app):
+    """Classes do Font Awesome, pesos e uso de itálico nos templates e assets."""
+    classes, weights, italic = set(), {400, 700}, False  # normal e <strong>/títulos
+    for path in _scanned_files(app):
+        with open(path, encoding='utf-8') as fh:
+            source = fh.read()
+        classes.update(_FA_CLASS.findall(source))
+        for value in _FONT_WEIGHT.findall(source) + _FONT_SHORTHAND.findall(source):
+            weights.add({'bold': 700, 'normal': 400}.get(value.lower()) or int(value))
+        italic = italic or bool(_ITALIC.search(source))
+    return classes - FONT_AWESOME_STYLES, weights, italic
+
+
+# Download (com cópia local)
+# ==========================
+
+class FontDownloadError(RuntimeError):
+    """Fonte original indisponível (sem rede no build, CDN fora do ar...)."""
+
+
+def _fetch(url, cache_dir):
+    extension = posixpath.splitext(urlsplit(url).path)[1]
+    path = os.path.join(cache_dir, hashlib.sha1(url.encode()).hexdigest()[:16] + extension)
+    if not os.path.exists(path):
+        request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+        try:
+            with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+                data = response.read()
+        except (urllib.error.URLError, TimeoutError) as exc:
+            raise FontDownloadError(f'{url}: {getattr(exc, "reason", exc)}') from exc
+        _write(path, data)
+    with open(path, 'rb') as fh:
+        return fh.read()
+
+
+def google_fonts_url(weights, italic):
+    families = []
+    for family, ((low, high), has_italic, opsz) in FAMILIES.items():
+        used = [w for w in weights if low <= w <= high] or [400]
+        wght = f'{min(used)}..{max(used)}' if len(used) > 1 else str(used[0])
+        if has_italic and italic:
+            axes = f'ital,opsz,wght@0,{opsz},{wght};1,{opsz},{wght}' if opsz else f'ital,wght@0,{wght};1,{wght}'
+        else:
+            axes = f'opsz,wght@{opsz},{wght}' if opsz else f'wght@{wght}'
+        families.append(f'family={family}:{axes}')
+    return f'{GOOGLE_FONTS_URL}?{"&".join(families)}&display=swap'
+
+
+def parse_google_css(css):
+    """[{family, style, weight: (min, max), url, unicode_range}] dos subsets em SUBSETS."""
+    faces = []
+    for subset_name, body in _FONT_FACE.findall(css):
+        if subset_name not in SUBSETS:
+            continue
+        descriptors = {name: value.strip() for name, value in _DESCRIPTOR.findall(body + ';')}
+        weight = [int(w) for w in descriptors['font-weight'].split()]
+        faces.append({
+            'family': descriptors['font-family'].strip('\'"'),
+            'style': descriptors.get('font-style', 'normal'),
+            'weight': (weight[0], weight[-1]),
+            'url': _FACE_URL.search(descriptors['src']).group(1).strip('\'"'),
+            'unicode_range': descriptors.get('unicode-range'),
+        })
+    return faces
+
+
+def parse_icon_codepoints(css):
+    """{classe: codepoint} de todos os ícones do all.css do Font Awesome."""
+    icons = {}
+    for selectors, body in re.findall(r'([^{}]+)\{([^{}]*)\}', css):
+        content = _CONTENT.search(body)
+        if not content:
+            continue
+        for name in _ICON_RULE.findall(selectors):
+            icons[name] = int(content.group(1), 16)
+    return icons
+
+
+def _unicodes(unicode_range):
+    codepoints = set()
+    for part in (unicode_range or 'U+0-FF').split(','):
+        low, _, high = part.strip()[2:].partition('-')
+        codepoints.update(range(int(low, 16), int(high or low, 16) + 1))
+    return codepoints
+
+
+# Subset
+# ======
+
+def subset_font(data, unicodes, wght=None):
+    """WOFF2 de `data` com apenas `unicodes`; limita o eixo wght das fontes variáveis."""
+    font = TTFont(io.BytesIO(data))
+    if wght and 'fvar' in font:
+        axis = next((a for a in font['fvar'].axes if a.axisTag == 'wght'), None)
+        if axis is not None:
+            low, high = max(wght[0], axis.minValue), min(wght[1], axis.maxValue)
+            font = instancer.instantiateVariableFont(font, {'wght': low if low == high else (low, high)})
+    options = ft_subset.Options()
+    options.flavor = 'woff2'
+    options.name_IDs = []  # nomes não são usados pelo navegador
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+    output = io.BytesIO()
+    font.flavor = 'woff2'
+    font.save(output)
+    return output.getvalue()
+
+
+def _save_font(static, stem, data):
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    built = posixpath.join(DIST_DIR, FONTS_DIR, f'{stem}.{digest}.woff2')
+    _write(os.path.join(static, built), data)
+    return built
+
+
+def _font_face(family, style, weight, filename, display, unicode_range=None):
+    if isinstance(weight, tuple):  # faixa de uma fonte variável, ex.: (400, 700)
+        weight = ' '.join(str(value) for value in dict.fromkeys(weight))
+    rule = (f'@font-face{{font-family:"{family}";font-style:{style};font-weight:{weight};'
+            f'font-display:{display};src:url({posixpath.basename(filename)}) format("woff2")')
+    if unicode_range:
+        rule += f';unicode-range:{unicode_range}'
+    return rule + '}'
+
+
+def build_fonts(app, source_dir=None):
+    """Gera os WOFF2 reduzidos + CSS + fonts.json e devolve o manifest."""
+    if ft_subset is None:
+        raise RuntimeError('fontTools não instalado: pip install fonttools brotli')
+
+    static = app.static_folder
+    source_dir = source_dir or app.config.get('FONTS_SOURCE_DIR') or os.path.join(app.instance_path, 'font-sources')
+    classes, weights, italic = scan_usage(app)
+    rules, files, preload = [], [], []
+
+    # Font Awesome: só os ícones usados
+    all_css = _fetch(f'{FONT_AWESOME_URL}/css/all.min.css', source_dir).decode('utf-8')
+    codepoints = parse_icon_codepoints(all_css)
+    icons = {name: codepoints[name] for name in sorted(classes) if name in codepoints}
+    for stem, family, weight in FONT_AWESOME_FACES:
+        data = _fetch(f'{FONT_AWESOME_URL}/webfonts/{stem}.woff2', source_dir)
+        if not set(TTFont(io.BytesIO(data)).getBestCmap()) & set(icons.values()):
+            continue  # nenhum ícone usado existe neste estilo
+        built = _save_font(static, stem, subset_font(data, set(icons.values())))
+        files.append(built)
+        rules.append(_font_face(family, 'normal', weight, built, 'block'))
+    rules.append(FONT_AWESOME_BASE_CSS)
+    rules.extend(f'.{name}:before{{content:"\\{codepoint:x}"}}' for name, codepoint in icons.items())
+
+    # Montserrat/Newsreader: subset latino, faixa de pesos usada
+    google_css = _fetch(google_fonts_url(weights, italic), source_dir).decode('utf-8')
+    for face in parse_google_css(google_css):
+        data = _fetch(face['url'], source_dir)
+        stem = f'{face["family"].lower()}-{face["style"]}'
+        built = _save_font(static, stem, subset_font(data, _unicodes(face['unicode_range']), face['weight']))
+        files.append(built)
+        rules.append(_font_face(face['family'], face['style'], face['weight'], built, 'swap', face['unicode_range']))
+        if face['style'] == 'normal':
+            preload.append(built)  # texto corrido e títulos aparecem já na primeira dobra
+
+    css = minify_css('\n'.join(rules)).encode('utf-8')
+    css_name = posixpath.join(DIST_DIR, FONTS_DIR, f'fonts.{hashlib.sha256(css).hexdigest()[:10]}.css')
+    css_path = os.path.join(static, css_name)
+    _write(css_path, css)
+    write_precompressed(css_path, css, os.stat(css_path).st_mtime_ns)
+
+    # Remove arquivos de builds anteriores
+    generated = {os.path.normpath(os.path.join(static, path)) for path in [css_name, *files]}
+    output_dir = os.path.join(static, DIST_DIR, FONTS_DIR)
+    for name in os.listdir(output_dir):
+        path = os.path.normpath(os.path.join(output_dir, name))
+        if path not in generated and path.rsplit('.', 1)[0] not in generated:
+            os.remove(path)
+
+    manifest = {'css': css_name, 'preload': preload, 'files': files,
+                'icons': sorted(icons), 'unknown_classes': sorted(classes - set(icons))}
+    with open(os.path.join(static, DIST_DIR, MANIFEST_NAME), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_font_manifest(app):
+    try:
+        with open(os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME), encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+class WebFonts:
+    """Helper de template `font_links()` baseado no fonts.json."""
+
+    def __init__(self):
+        self.manifest = {}
+
+    @property
+    def self_hosted(self):
+        return bool(self.manifest)
+
+    def init_app(self, app):
+        self.manifest = load_font_manifest(app)
+        app.jinja_env.globals['font_links'] = self.font_links
+        # Nomes com hash: servidos com cache imutável
+        if self.manifest:
+            assets.built.update([self.manifest['css'], *self.manifest['files']])
+
+    def font_links(self, text_fonts=True):
+        """<link> das fontes: preload + CSS gerado, ou as CDNs sem `flask fonts build`."""
+        if not self.manifest:
+            links = [f'<link rel="stylesheet" href="{FONT_AWESOME_URL}/css/all.min.css" '
+                     f'integrity="{FONT_AWESOME_INTEGRITY}" crossorigin="anonymous" referrerpolicy="no-referrer">']
+            if text_fonts:
+                links.append(CDN_LINKS)
+            return Markup('\n'.join(links))
+        links = []
+        if text_fonts:
+            links += [f'<link rel="preload" href="{url_for("static", filename=path)}" as="font" '
+                      'type="font/woff2" crossorigin>' for path in self.manifest['preload']]
+        links.append(f'<link rel="stylesheet" href="{url_for("static", filename=self.manifest["css"])}">')
+        return Markup('\n'.join(links))
+
+
+web_fonts = WebFonts()
@@ -0,0 +1,98 @@
+# app/fragments.py
+"""Cache de trechos de template: `{% cache chave, ttl, 'Modelo', ... %}`.
+
+    {% cache 'home-depoimentos', none, 'Depoimento' %}
+        ... só renderizado quando não está no cache ...
+    {% endcache %}
+
+- `chave` identifica o trecho (junto com o host da requisição);
+- `ttl` em segundos, ou none para usar FRAGMENT_CACHE_TTL;
+- os demais argumentos são modelos de TRACKED_MODELS: salvar um deles no
+  admin descarta só os trechos que dependem dele, em todos os workers (ver
+  cache.py). Trechos sem modelo só expiram pelo TTL ou no próximo deploy.
+
+A nonce CSP da requisição é trocada por NONCE_PLACEHOLDER ao guardar e
+reinserida a cada uso, como no cache de páginas.
+
+Para que um trecho guardado também economize as consultas, a view passa
+`lazy(query)` em vez de `query.all()`: a consulta só roda se o template
+iterar o resultado, ou seja, quando o trecho não está no cache.
+"""
+from flask import current_app, g, has_request_context, request
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from .cache import NONCE_PLACEHOLDER, TRACKED_MODELS, LRUCache
+
+
+class LazyResult:
+    """Resultado de uma consulta executada só no primeiro uso pelo template."""
+
+    def __init__(self, query):
+        self._query = query
+        self._items = None
+
+    def _resolve(self):
+        if self._items is None:
+            self._items = self._query.all()
+        return self._items
+
+    def __iter__(self):
+        return iter(self._resolve())
+
+    def __len__(self):
+        return len(self._resolve())
+
+    def __bool__(self):
+        return bool(self._resolve())
+
+
+def lazy(query):
+    return LazyResult(query)
+
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        call = self.call_method('_render', [nodes.List(args)])
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _render(self, args, caller):
+        key, ttl, *models = [*args, None] if len(args) == 1 else args
+        unknown = set(models) - TRACKED_MODELS
+        if unknown:
+            raise ValueError(f'{{% cache %}}: {", ".join(sorted(unknown))} não invalida caches (ver TRACKED_MODELS)')
+        if not current_app.config.get('FRAGMENT_CACHE_ENABLED'):
+            return caller()
+
+        cache_key = (request.host if has_request_context() else None, key)
+        nonce = g.get('csp_nonce') or ''
+        body = fragment_cache.get(cache_key)
+        if body is None:
+            body = str(caller())
+            fragment_cache.set(cache_key, body.replace(nonce, NONCE_PLACEHOLDER) if nonce else body,
+                               tags=models, ttl=ttl)
+            return Markup(body)
+        return Markup(body.replace(NONCE_PLACEHOLDER, nonce))
+
+
+class FragmentCache(LRUCache):
+    """Trechos de template renderizados, por host + chave do {% cache %}."""
+
+    def init_app(self, app):
+        app.config.setdefault('FRAGMENT_CACHE_ENABLED', True)
+        app.config.setdefault('FRAGMENT_CACHE_MAX_ENTRIES', 256)
+        app.config.setdefault('FRAGMENT_CACHE_TTL', 3600)
+        self.max_entries = app.config['FRAGMENT_CACHE_MAX_ENTRIES']
+        self.ttl = app.config['FRAGMENT_CACHE_TTL']
+        app.jinja_env.add_extension(FragmentCacheExtension)
+
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,124 @@
+# app/hints.py
+"""Preload/preconnect dos recursos do <head> via `Link` e 103 Early Hints.
+
+Na primeira resposta HTML de cada endpoint os <link> do <head> (stylesheet,
+preload, preconnect) são lidos e guardados; como o <head> vem do layout, a
+lista reflete os assets que os templates daquele endpoint realmente usam.
+Nas requisições seguintes:
+- antes da view, um 103 Early Hints é enviado quando o servidor oferece
+  `wsgi.early_hints` (gunicorn), enquanto o banco e o template trabalham;
+- a resposta final leva o cabeçalho `Link` (CDNs como a Cloudflare também o
+  convertem em 103 para as próximas visitas).
+
+Stylesheets do próprio site viram `rel=preload`; os de outros domínios viram
+`rel=preconnect` com a origem, já que preload com integrity não é confiável.
+"""
+import re
+import threading
+from urllib.parse import urlsplit
+
+from flask import current_app, request
+
+MAX_LINKS = 8
+
+_LINK_TAG = re.compile(r'<link\b([^>]*)>', re.I)
+_ATTR = re.compile(r'([\w-]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'))?')
+
+
+def _attributes(tag):
+    return {name.lower(): double if double is not None else single
+            for name, double, single in _ATTR.findall(tag)}
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f'{parts.scheme or "https"}://{parts.netloc}'
+
+
+def head_links(html):
+    """Valores do cabeçalho Link para os recursos do <head> de `html`."""
+    head = html.split('</head>', 1)[0]
+    links = []
+    for match in _LINK_TAG.finditer(head):
+        attrs = _attributes(match.group(1))
+        rel = (attrs.get('rel') or '').lower()
+        href = attrs.get('href')
+        if not href:
+            continue
+        crossorigin = '; crossorigin' if 'crossorigin' in attrs else ''
+        if rel == 'stylesheet':
+            if href.startswith('/') and not href.startswith('//'):
+                links.append(f'<{href}>; rel=preload; as=style')
+            else:
+                links.append(f'<{_origin(href)}>; rel=preconnect{crossorigin}')
+        elif rel == 'preconnect':
+            links.append(f'<{href}>; rel=preconnect{crossorigin}')
+        elif rel == 'preload' and attrs.get('as'):
+            extra = f'; type={attrs["type"]}' if attrs.get('type') else ''
+            links.append(f'<{href}>; rel=preload; as={attrs["as"]}{extra}{crossorigin}')
+    return list(dict.fromkeys(links))[:MAX_LINKS]
+
+
+class EarlyHints:
+    """Aprende os links por endpoint e os envia nas requisições seguintes."""
+
+    def __init__(self):
+        self._links = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('EARLY_HINTS_ENABLED', True)
+        app.before_request(self._send_early_hints)
+        app.after_request(self._add_link_header)
+
+    def _header(self):
+        return self._links.get(request.endpoint)
+
+    def _learn(self, endpoint, html):
+        with self._lock:
+            self._links[endpoint] = ', '.join(head_links(html))
+
+    def _send_early_hints(self):
+        if not current_app.config['EARLY_HINTS_ENABLED'] or request.method != 'GET':
+            return
+        send = request.environ.get('wsgi.early_hints')
+        header = self._header()
+        if send and header and request.environ.get('SERVER_PROTOCOL') != 'HTTP/1.0':
+            try:
+                send([('Link', header)])
+            except OSError:
+                pass
+
+    def _add_link_header(self, response):
+        if (not current_app.config['EARLY_HINTS_ENABLED'] or request.method != 'GET'
+                or response.status_code != 200 or response.mimetype != 'text/html'):
+            return response
+        header = self._header()
+        if header is None:
+            endpoint = request.endpoint
+            if response.is_streamed:
+                response.response = self._learn_from_stream(endpoint, response.response)
+            else:
+                self._learn(endpoint, response.get_data(as_text=True))
+                header = self._header()
+        if header:
+            response.headers['Link'] = header
+        return response
+
+    def _learn_from_stream(self, endpoint, chunks):
+        # Observa os primeiros pedaços até o fim do <head> (a resposta já saiu sem Link)
+        head = []
+        try:
+            for chunk in chunks:
+                if head is not None:
+                    head.append(chunk.decode('utf-8', 'replace') if isinstance(chunk, bytes) else chunk)
+                    if '</head>' in ''.join(head[-2:]):
+                        self._learn(endpoint, ''.join(head))
+                        head = None
+                yield chunk
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+
+early_hints = EarlyHints()
@@ -0,0 +1,174 @@
+# app/images.py
+"""Derivados responsivos das imagens (AVIF/WebP/JPEG em várias larguras).
+
+`flask images build` redimensiona as imagens de static/images/ e grava os
+derivados em static/dist/images/ junto com um images.json. O helper
+`picture()` disponível nos templates usa esse manifest para emitir
+<picture>/srcset com width/height; sem manifest, emite um <img> simples.
+"""
+import hashlib
+import json
+import os
+import posixpath
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image, features
+except ImportError:  # pragma: no cover - Pillow só é necessário no build
+    Image = features = None
+
+from .assets import DIST_DIR, assets
+
+IMAGES_DIR = 'images'
+MANIFEST_NAME = 'images.json'
+SOURCE_EXTENSIONS = {'.jpg': 'jpeg', '.jpeg': 'jpeg', '.png': 'png'}
+
+DEFAULT_WIDTHS = (480, 768, 1080, 1440, 1920)
+# Imagens exibidas pequenas (o logo aparece com ~74px de largura)
+WIDTHS = {
+    'images/logo.png': (80, 160, 240),
+    'images/logo-antiga.png': (80, 160, 240),
+}
+QUALITY = {'avif': 50, 'webp': 75, 'jpeg': 78}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg', 'png': 'png'}
+
+
+def _save(image, path, fmt):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fmt == 'png':
+        image.save(path, 'PNG', optimize=True)
+    elif fmt == 'jpeg':
+        image.convert('RGB').save(path, 'JPEG', quality=QUALITY['jpeg'], optimize=True, progressive=True)
+    else:
+        image.save(path, fmt.upper(), quality=QUALITY[fmt])
+
+
+def build_images(app, formats=None):
+    """Gera os derivados de todas as imagens e devolve o manifest."""
+    if Image is None:
+        raise RuntimeError('Pillow não instalado: pip install Pillow')
+
+    static = app.static_folder
+    if formats is None:
+        formats = [fmt for fmt in ('avif', 'webp') if features.check(fmt)]
+    manifest = {}
+    generated = set()
+
+    for name in sorted(os.listdir(os.path.join(static, IMAGES_DIR))):
+        stem, ext = os.path.splitext(name)
+        fallback = SOURCE_EXTENSIONS.get(ext.lower())
+        if not fallback:
+            continue
+        logical = posixpath.join(IMAGES_DIR, name)
+        source_path = os.path.join(static, IMAGES_DIR, name)
+        with open(source_path, 'rb') as fh:
+            digest = hashlib.sha256(fh.read()).hexdigest()[:10]
+
+        with Image.open(source_path) as original:
+            original.load()
+        width, height = original.size
+        widths = [w for w in WIDTHS.get(logical, DEFAULT_WIDTHS) if w < width] or [width]
+
+        sources = {}
+        for fmt in [*formats, fallback]:
+            variants = []
+            for target_width in widths:
+                resized = original
+                if target_width != width:
+                    resized = original.resize((target_width, round(height * target_width / width)), Image.LANCZOS)
+                built = posixpath.join(DIST_DIR, IMAGES_DIR, f'{stem}-{target_width}w.{digest}.{EXTENSIONS[fmt]}')
+                path = os.path.join(static, built)
+                if not os.path.exists(path):
+                    _save(resized, path, fmt)
+                generated.add(os.path.normpath(path))
+                variants.append([built, target_width])
+            sources[fmt] = variants
+
+        manifest[logical] = {'width': width, 'height': height, 'fallback': fallback, 'sources': sources}
+
+    # Remove derivados de versões anteriores das imagens
+    output_dir = os.path.join(static, DIST_DIR, IMAGES_DIR)
+    if os.path.isdir(output_dir):
+        for name in os.listdir(output_dir):
+            path = os.path.normpath(os.path.join(output_dir, name))
+            if path not in generated:
+                os.remove(path)
+
+    with open(os.path.join(static, DIST_DIR, MANIFEST_NAME), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_image_manifest(app):
+    try:
+        with open(os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME), encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def largest_variant(entry, fmt=None):
+    """Caminho do maior derivado no formato pedido (padrão: o de fallback)."""
+    return entry['sources'][fmt or entry['fallback']][-1][0]
+
+
+class ResponsiveImages:
+    """Helper de template `picture()` baseado no images.json."""
+
+    def __init__(self):
+        self.manifest = {}
+
+    def init_app(self, app):
+        self.manifest = load_image_manifest(app)
+        app.jinja_env.globals['picture'] = self.picture
+        # Derivados têm hash no nome: servidos com cache imutável
+        for entry in self.manifest.values():
+            for variants in entry['sources'].values():
+                assets.built.update(path for path, _width in variants)
+
+    def _srcset(self, variants):
+        return ', '.join(f"{url_for('static', filename=path)} {width}w" for path, width in variants)
+
+    def picture(self, filename, alt, sizes='100vw', width=None, loading='lazy', **attrs):
+        """Emite <picture> com srcset por formato e width/height para reservar espaço."""
+        entry = self.manifest.get(filename)
+        if entry:
+            intrinsic_width, intrinsic_height = entry['width'], entry['height']
+        else:
+            intrinsic_width = intrinsic_height = None
+        if width and intrinsic_width:
+            height = round(intrinsic_height * width / intrinsic_width)
+        else:
+            width, height = intrinsic_width, intrinsic_height
+
+        img_attrs = {'alt': alt, 'loading': loading, 'decoding': 'async', **attrs}
+        if width:
+            img_attrs.update(width=width, height=height)
+
+        if not entry:
+            img_attrs['src'] = url_for('static', filename=filename)
+            return Markup(f'<img {self._attrs(img_attrs)}>')
+
+        fallback = entry['fallback']
+        parts = ['<picture>']
+        for fmt, variants in entry['sources'].items():
+            if fmt != fallback:
+                parts.append(f'<source type="{MIME_TYPES[fmt]}" srcset="{self._srcset(variants)}" sizes="{escape(sizes)}">')
+        img_attrs.update(
+            src=url_for('static', filename=largest_variant(entry)),
+            srcset=self._srcset(entry['sources'][fallback]),
+            sizes=sizes,
+        )
+        parts.append(f'<img {self._attrs(img_attrs)}>')
+        parts.append('</picture>')
+        return Markup(''.join(parts))
+
+    @staticmethod
+    def _attrs(attrs):
+        return ' '.join(f'{key.rstrip("_").replace("_", "-")}="{escape(value)}"' for key, value in attrs.items())
+
+
+responsive_images = ResponsiveImages()
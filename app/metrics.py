@@ -0,0 +1,380 @@
+# app/metrics.py
+"""Métricas de desempenho por requisição.
+
+Para cada requisição são medidos o tempo total, a quantidade de comandos SQL
+e o tempo gasto no banco (eventos before/after_cursor_execute) e na
+renderização de templates (sinais before_render_template/template_rendered).
+
+- O cabeçalho `Server-Timing` mostra esses números no DevTools do navegador:
+  só para admins logados ou quem envia o METRICS_TOKEN, a não ser que
+  METRICS_SERVER_TIMING ligue para todos (ex.: benchmark.py).
+- Os totais por endpoint alimentam histogramas de latência exibidos em
+  /admin/metricas e em /metrics (formato texto do Prometheus).
+- Outros módulos registram contadores avulsos com `metrics.increment`
+  (ex.: tentativas de login em passwords.py).
+
+Cada worker do gunicorn acumula em memória e grava periodicamente (e ao
+sair, no worker_exit do gunicorn.conf.py) um arquivo metrics-<pid>.json em
+METRICS_DIR; a leitura soma os arquivos de todos os workers (inclusive de
+workers já reciclados, já que são contadores).
+"""
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import Response, abort, current_app, g, has_request_context, request
+from flask import before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Limites superiores (segundos) dos buckets do histograma de latência
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_INTERVAL = 5  # segundos entre gravações do arquivo do worker
+LOCAL_ADDRESSES = {'127.0.0.1', '::1'}
+# Requisições internas (aquecimento do cache) marcam o environ e não são medidas
+SKIP_ENVIRON_KEY = 'cpi.metrics.skip'
+
+
+def _new_series():
+    return {
+        'count': 0,
+        'duration': 0.0,
+        'buckets': [0] * (len(BUCKETS) + 1),  # o último é +Inf
+        'sql_count': 0,
+        'sql_time': 0.0,
+        'template_time': 0.0,
+    }
+
+
+def _merge(target, series):
+    target['count'] += series['count']
+    target['duration'] += series['duration']
+    target['buckets'] = [a + b for a, b in zip(target['buckets'], series['buckets'])]
+    for field in ('sql_count', 'sql_time', 'template_time'):
+        target[field] += series[field]
+
+
+def _bucket_index(seconds):
+    for index, bound in enumerate(BUCKETS):
+        if seconds <= bound:
+            return index
+    return len(BUCKETS)
+
+
+def quantile(series, q):
+    """Estimativa de quantil a partir dos buckets (limite superior do bucket)."""
+    if not series['count']:
+        return None
+    target = q * series['count']
+    seen = 0
+    for index, count in enumerate(series['buckets']):
+        seen += count
+        if seen >= target:
+            return BUCKETS[index] if index < len(BUCKETS) else float('inf')
+    return float('inf')
+
+
+def _read_worker(path):
+    """(séries, contadores) gravados por um worker; arquivos antigos só têm as séries."""
+    with open(path, encoding='utf-8') as fh:
+        data = json.load(fh)
+    if 'series' in data:
+        return data['series'], data.get('counters', {})
+    return data, {}
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+# Medição das consultas e templates (só dentro de uma requisição)
+# ===============================================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_request_context() and 'metrics' in g:
+        g.metrics['sql_count'] += 1
+        g.metrics['sql_time'] += elapsed
+
+
+def _before_render_template(sender, template, context, **extra):
+    if 'metrics' in g:
+        g.metrics['template_starts'].append(time.perf_counter())
+
+
+def _template_rendered(sender, template, context, **extra):
+    if 'metrics' in g and g.metrics['template_starts']:
+        g.metrics['template_time'] += time.perf_counter() - g.metrics['template_starts'].pop()
+
+
+class Metrics:
+    """Coleta por worker + agregação entre workers via arquivos JSON."""
+
+    def __init__(self):
+        self.directory = None
+        self._series = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_SERVER_TIMING', False)
+        app.config.setdefault('METRICS_TOKEN', None)
+        if not app.config['METRICS_ENABLED']:
+            return
+        self.directory = app.config.get('METRICS_DIR') or os.path.join(app.instance_path, 'metrics')
+        os.makedirs(self.directory, exist_ok=True)
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        before_render_template.connect(_before_render_template, app)
+        template_rendered.connect(_template_rendered, app)
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.add_url_rule('/metrics', 'metrics', self.prometheus_view)
+
+    # Requisição
+    # ----------
+
+    def _start(self):
+        if request.environ.get(SKIP_ENVIRON_KEY):
+            return
+        g.metrics = {'start': time.perf_counter(), 'sql_count': 0, 'sql_time': 0.0,
+                     'template_time': 0.0, 'template_starts': []}
+
+    def _finish(self, response):
+        data = g.pop('metrics', None)
+        if data is None:
+            return response
+        duration = time.perf_counter() - data['start']
+        if self._server_timing_allowed():
+            response.headers['Server-Timing'] = ', '.join([
+                f'db;dur={data["sql_time"] * 1000:.1f};desc="{data["sql_count"]} SQL"',
+                f'tpl;dur={data["template_time"] * 1000:.1f}',
+                f'total;dur={duration * 1000:.1f}',
+            ])
+        self.observe(request.endpoint or 'unknown', request.method, response.status_code, duration,
+                     data['sql_count'], data['sql_time'], data['template_time'])
+        return response
+
+    @staticmethod
+    def _has_token():
+        token = current_app.config['METRICS_TOKEN']
+        return bool(token) and request.headers.get('Authorization') == f'Bearer {token}'
+
+    def _server_timing_allowed(self):
+        if current_app.config['METRICS_SERVER_TIMING'] or self._has_token():
+            return True
+        # Só se a requisição já carregou o usuário: consultar a sessão aqui
+        # acrescentaria Vary: Cookie às páginas públicas
+        user = g.get('_login_user')
+        return bool(user is not None and user.is_authenticated)
+
+    def observe(self, endpoint, method, status, duration, sql_count=0, sql_time=0.0, template_time=0.0):
+        key = f'{endpoint}|{method}|{status}'
+        with self._lock:
+            series = self._series.setdefault(key, _new_series())
+            series['count'] += 1
+            series['duration'] += duration
+            series['buckets'][_bucket_index(duration)] += 1
+            series['sql_count'] += sql_count
+            series['sql_time'] += sql_time
+            series['template_time'] += template_time
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def increment(self, name, amount=1, **labels):
+        """Soma `amount` ao contador `name` (com rótulos), agregado entre workers."""
+        key = name + ('{' + ','.join(f'{k}="{_label(v)}"' for k, v in sorted(labels.items())) + '}' if labels else '')
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    # Agregação entre workers
+    # -----------------------
+
+    def _path(self, pid=None):
+        return os.path.join(self.directory, f'metrics-{pid or os.getpid()}.json')
+
+    def flush(self):
+        """Grava os totais deste worker (escrita atômica)."""
+        if not self.directory:
+            return
+        with self._lock:
+            payload = json.dumps({'series': self._series, 'counters': self._counters})
+            self._last_flush = time.monotonic()
+        path = self._path()
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            fh.write(payload)
+        os.replace(tmp, path)
+
+    def _workers(self):
+        self.flush()
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            try:
+                yield _read_worker(path)
+            except (OSError, ValueError):
+                continue
+
+    def collect(self):
+        """Soma os totais de todos os workers: {(endpoint, método, status): série}."""
+        if not self.directory:
+            return {}
+        totals = {}
+        for worker, _counters in self._workers():
+            for key, series in worker.items():
+                _merge(totals.setdefault(tuple(key.split('|')), _new_series()), series)
+        return totals
+
+    def counters(self):
+        """Soma dos contadores de `increment` de todos os workers: {chave: valor}."""
+        if not self.directory:
+            return dict(self._counters)
+        totals = {}
+        for _series, counters in self._workers():
+            for key, value in counters.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def compact(self):
+        """Junta os arquivos de workers encerrados em metrics-rollup.json.
+
+        Com max_requests os workers são reciclados e cada um deixa seu arquivo;
+        sem a compactação a leitura do /metrics fica mais lenta a cada deploy.
+        Devolve quantos arquivos foram incorporados.
+        """
+        if not self.directory:
+            return 0
+        rollup_path = self._path('rollup')
+        dead = []
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            pid = os.path.basename(path)[len('metrics-'):-len('.json')]
+            if pid.isdigit() and not _pid_alive(int(pid)):
+                dead.append(path)
+        if not dead:
+            return 0
+
+        totals, counters = {}, {}
+        for path in [rollup_path, *dead]:
+            try:
+                worker, worker_counters = _read_worker(path)
+            except (OSError, ValueError):
+                continue
+            for key, series in worker.items():
+                _merge(totals.setdefault(key, _new_series()), series)
+            for key, value in worker_counters.items():
+                counters[key] = counters.get(key, 0) + value
+        tmp = f'{rollup_path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            json.dump({'series': totals, 'counters': counters}, fh)
+        os.replace(tmp, rollup_path)
+        for path in dead:
+            os.remove(path)
+        return len(dead)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._counters.clear()
+        for path in glob.glob(os.path.join(self.directory or '', 'metrics-*.json')):
+            os.remove(path)
+
+    def summary(self):
+        """Linhas por endpoint para a página do admin (mais lentas primeiro)."""
+        by_endpoint = {}
+        for (endpoint, method, _status), series in self.collect().items():
+            _merge(by_endpoint.setdefault((endpoint, method), _new_series()), series)
+        rows = []
+        for (endpoint, method), series in by_endpoint.items():
+            count = series['count']
+            rows.append({
+                'endpoint': endpoint,
+                'method': method,
+                'count': count,
+                'avg_ms': series['duration'] / count * 1000,
+                'p50_ms': quantile(series, 0.5) * 1000,
+                'p95_ms': quantile(series, 0.95) * 1000,
+                'p99_ms': quantile(series, 0.99) * 1000,
+                'avg_queries': series['sql_count'] / count,
+                'avg_db_ms': series['sql_time'] / count * 1000,
+                'avg_template_ms': series['template_time'] / count * 1000,
+            })
+        rows.sort(key=lambda row: row['avg_ms'] * row['count'], reverse=True)
+        return rows
+
+    def prometheus(self):
+        lines = [
+            '# HELP cpi_http_request_duration_seconds Latência das requisições por endpoint',
+            '# TYPE cpi_http_request_duration_seconds histogram',
+        ]
+        totals = sorted(self.collect().items())
+        for (endpoint, method, status), series in totals:
+            labels = f'endpoint="{_label(endpoint)}",method="{method}",status="{status}"'
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, '+Inf'), series['buckets']):
+                cumulative += count
+                lines.append(f'cpi_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'cpi_http_request_duration_seconds_sum{{{labels}}} {series["duration"]:.6f}')
+            lines.append(f'cpi_http_request_duration_seconds_count{{{labels}}} {series["count"]}')
+
+        for name, field, help_text in (
+            ('cpi_db_queries_total', 'sql_count', 'Comandos SQL executados'),
+            ('cpi_db_query_seconds_total', 'sql_time', 'Tempo gasto no banco'),
+            ('cpi_template_render_seconds_total', 'template_time', 'Tempo gasto renderizando templates'),
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (endpoint, method, status), series in totals:
+                labels = f'endpoint="{_label(endpoint)}",method="{method}",status="{status}"'
+                value = series[field]
+                lines.append(f'{name}{{{labels}}} {value if isinstance(value, int) else f"{value:.6f}"}')
+
+        declared = set()
+        for key, value in sorted(self.counters().items()):
+            name = key.split('{', 1)[0]
+            if name not in declared:
+                declared.add(name)
+                lines.append(f'# TYPE {name} counter')
+            lines.append(f'{key} {value if isinstance(value, int) else f"{value:.6f}"}')
+        return '\n'.join(lines) + '\n'
+
+    def prometheus_view(self):
+        # Com METRICS_TOKEN exige o token; sem ele, só responde a coletores locais
+        if current_app.config['METRICS_TOKEN']:
+            if not self._has_token():
+                abort(404)
+        elif request.remote_addr not in LOCAL_ADDRESSES:
+            abort(404)
+        from .database import db_profile
+        from .scheduler import scheduler
+        response = Response(self.prometheus() + scheduler.prometheus() + db_profile.prometheus(),
+                            mimetype='text/plain; version=0.0.4')
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+
+metrics = Metrics()
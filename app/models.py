@@ -1,7 +1,8 @@
 # app/models.py
+import hashlib
+
 from . import db
 from datetime import datetime, timezone
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 
 # app/models.py - Adicione estes campos se quiser mais informações
@@ -15,15 +16,35 @@ class Usuario(db.Model, UserMixin):
     last_login = db.Column(db.DateTime, nullable=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        # Executor limitado e método de PASSWORD_HASH_METHOD (ver passwords.py)
+        from .passwords import hash_password
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        from .passwords import password_hasher
+        return password_hasher.verify(self.password_hash, password)
+
+    @property
+    def session_version(self):
+        """Muda quando a senha é trocada ou o usuário é (des)ativado."""
+        raw = f'{self.password_hash}:{bool(self.is_active)}'.encode()
+        return hashlib.sha256(raw).hexdigest()[:12]
+
+    def get_id(self):
+        # A versão vai na sessão: trocar a senha ou desativar encerra as sessões abertas
+        return f'{self.id}:{self.session_version}'
 
     def __repr__(self):
         return f'<Usuario {self.username}>'
 
 class Post(db.Model):
+    # Índices no formato das consultas públicas (parciais no PostgreSQL)
+    __table_args__ = (
+        db.Index('ix_post_published_date', 'is_published', 'date_posted', 'id',
+                 postgresql_where=db.text('is_published')),
+        db.Index('ix_post_date_posted', 'date_posted', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     slug = db.Column(db.String(100), unique=True, nullable=False)
     title = db.Column(db.String(200), nullable=False)
@@ -31,23 +52,39 @@ class Post(db.Model):
     content = db.Column(db.Text, nullable=False)
     date_posted = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
     is_published = db.Column(db.Boolean, default=False)
-    author_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False, index=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
     
-    author = db.relationship('Usuario', backref=db.backref('posts', lazy=True))
+    # passive_deletes: excluir um usuário não carrega os posts dele (delete_usuario já checa via EXISTS)
+    author = db.relationship('Usuario', backref=db.backref('posts', lazy=True, passive_deletes=True))
 
     def __repr__(self):
         return f'<Post {self.title}>'
     
 class Depoimento(db.Model):
+    __table_args__ = (
+        db.Index('ix_depoimento_visible', 'is_visible', 'id',
+                 postgresql_where=db.text('is_visible')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     quote = db.Column(db.Text, nullable=False)
     author = db.Column(db.String(100), nullable=False)
     is_visible = db.Column(db.Boolean, default=True, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
 
     def __repr__(self):
         return f'<Depoimento {self.author}>'
 
 class Evento(db.Model):
+    __table_args__ = (
+        db.Index('ix_evento_active_date', 'is_active', 'event_date', 'id',
+                 postgresql_where=db.text('is_active')),
+        db.Index('ix_evento_event_date', 'event_date', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
@@ -55,6 +92,8 @@ class Evento(db.Model):
     location = db.Column(db.String(200), nullable=False)
     registration_link = db.Column(db.String(300), nullable=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
 
     def __repr__(self):
         return f'<Evento {self.title}>'
\ No newline at end of file
@@ -0,0 +1,185 @@
+# app/pagination.py
+"""Paginação por keyset (cursor) para as listagens públicas e do admin.
+
+Em vez de OFFSET + COUNT(*) a cada página, a consulta continua a partir da
+chave de ordenação do último item exibido, ex.: (date_posted, id). O custo
+de qualquer página é o mesmo da primeira. A posição viaja na query string
+como um token opaco (`?cursor=...`).
+"""
+import base64
+import binascii
+import json
+import operator
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from .cache import LRUCache
+
+# Totais aproximados: recalculados no máximo a cada 5 minutos ou quando o
+# modelo correspondente é alterado.
+_totals = LRUCache(max_entries=64, ttl=300)
+
+
+class KeysetPage:
+    """Uma página de resultados com os cursores para a anterior e a próxima."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, total=None, has_prev=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        # has_prev sem prev_cursor: a anterior é a primeira página, cuja URL não leva cursor
+        self.prev_cursor = prev_cursor
+        self.has_prev = prev_cursor is not None if has_prev is None else has_prev
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, [_encode_value(v) for v in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _coerce(value, column):
+    """Valor do cursor no tipo da coluna de ordenação (ValueError se não couber)."""
+    python_type = column.type.python_type
+    if isinstance(value, python_type) and not isinstance(value, bool):
+        return value
+    if python_type is datetime and isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if python_type is int and isinstance(value, str):
+        return int(value)
+    raise ValueError(f'valor inválido para {column.key}: {value!r}')
+
+
+def decode_cursor(token, size, columns=None):
+    """Devolve (direção, valores) ou None se o token for inválido.
+
+    Com `columns`, cada valor é convertido para o tipo da coluna: um cursor
+    adulterado vira None (primeira página) em vez de erro no banco.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, values = json.loads(raw)
+        values = [_decode_value(v) for v in values]
+        if direction not in ('n', 'p') or len(values) != size:
+            return None
+        if columns is not None:
+            values = [_coerce(value, column) for value, column in zip(values, columns)]
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return None
+    return direction, values
+
+
+def keyset_condition(columns, values, compare):
+    """(c1, c2, ...) comparado lexicograficamente a (v1, v2, ...)."""
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, compare(column, values[i])))
+    return or_(*clauses)
+
+
+def _key(item, columns):
+    return [getattr(item, column.key) for column in columns]
+
+
+def approximate_total(query, cache_key, model):
+    total = _totals.get(cache_key)
+    if total is None:
+        total = query.order_by(None).count()
+        _totals.set(cache_key, total, tags=(model,))
+    return total
+
+
+def keyset_paginate(query, columns, per_page, cursor=None, descending=False, total_key=None):
+    """Pagina `query` ordenando por `columns` (a última deve ser única, ex.: id).
+
+    `total_key`, se informado, liga o total aproximado (COUNT em cache).
+    """
+    order = [c.desc() if descending else c.asc() for c in columns]
+    reverse_order = [c.asc() if descending else c.desc() for c in columns]
+    forward = operator.lt if descending else operator.gt
+    backward = operator.gt if descending else operator.lt
+
+    total = None
+    if total_key is not None:
+        total = approximate_total(query, total_key, query.column_descriptions[0]['entity'])
+
+    decoded = decode_cursor(cursor, len(columns), columns)
+    if decoded and decoded[0] == 'p':
+        # Página anterior: percorre no sentido inverso e depois desinverte
+        rows = (query.filter(keyset_condition(columns, decoded[1], backward))
+                .order_by(*reverse_order).limit(per_page + 1).all())
+        has_prev = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_next = True
+    else:
+        page_query = query
+        if decoded:
+            page_query = query.filter(keyset_condition(columns, decoded[1], forward))
+        rows = page_query.order_by(*order).limit(per_page + 1).all()
+        items = rows[:per_page]
+        has_next = len(rows) > per_page
+        has_prev = decoded is not None
+
+    if not items:
+        return KeysetPage(items, total=total)
+    prev_cursor = None
+    if has_prev:
+        # Até per_page itens antes desta página: a anterior é a primeira (link sem cursor,
+        # para não criar uma segunda URL para ela)
+        before = (query.filter(keyset_condition(columns, _key(items[0], columns), backward))
+                  .order_by(*reverse_order).limit(per_page + 1).count())
+        if before > per_page:
+            prev_cursor = encode_cursor('p', _key(items[0], columns))
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor('n', _key(items[-1], columns)) if has_next else None,
+        prev_cursor=prev_cursor,
+        total=total,
+        has_prev=has_prev,
+    )
+
+
+class DeferredPage:
+    """KeysetPage calculada só no primeiro acesso.
+
+    Com stream_template o <head> já foi enviado quando o template chega na
+    listagem; as consultas rodam nesse momento, e não antes de responder.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._args = args
+        self._kwargs = kwargs
+        self._page = None
+
+    def _resolve(self):
+        if self._page is None:
+            self._page = keyset_paginate(*self._args, **self._kwargs)
+        return self._page
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __iter__(self):
+        return iter(self._resolve())
@@ -0,0 +1,240 @@
+# app/passwords.py
+"""Hash de senhas fora da thread da requisição e limite de tentativas de login.
+
+O hash do Werkzeug (scrypt/pbkdf2) é lento de propósito. Para que uma rajada
+de logins não ocupe todas as threads do gunicorn e trave o site público:
+- cada tentativa passa antes por dois token buckets, por IP e por usuário
+  (somando todos os IPs, contra ataques distribuídos); o do usuário é mais
+  folgado e repõe uma ficha a cada poucos segundos, para que um anônimo
+  errando a senha do admin não o bloqueie por muito tempo; o excesso é
+  recusado (429) sem calcular hash nenhum;
+- o hash roda num executor com LOGIN_HASH_WORKERS threads e no máximo
+  LOGIN_HASH_QUEUE tentativas na fila; hash + fila nunca passam de
+  GUNICORN_THREADS - 1, para sempre sobrar uma thread do worker para o
+  site público (o padrão da fila é o que cabe nesse limite). Além disso, ou
+  se o hash não terminar em LOGIN_HASH_TIMEOUT segundos, a tentativa é
+  recusada (503). A vaga na fila só é liberada quando o hash termina, então
+  o limite vale mesmo para quem já desistiu de esperar;
+- usuário inexistente também custa um hash (de uma senha aleatória), para
+  o tempo de resposta não revelar quais usuários existem;
+- hashes gerados com outro PASSWORD_HASH_METHOD são refeitos no login.
+
+Os buckets e o executor são de cada worker. Tentativas, recusas e esperas
+vão para os contadores de metrics.py (/admin/metricas e /metrics).
+"""
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+from flask import current_app, has_app_context, request
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from .database import gunicorn_threads
+from .metrics import metrics
+
+DEFAULT_METHOD = 'scrypt'
+ATTEMPT_RESULTS = ('ok', 'invalid', 'throttled', 'busy')
+
+
+class LoginBusy(Exception):
+    """Todas as vagas do executor de hash estão ocupadas."""
+
+
+def _parse_rate(value):
+    """'10/60' → (capacidade 10, reposição de 10 fichas a cada 60 s)."""
+    capacity, _, seconds = str(value).partition('/')
+    return int(capacity), float(seconds or 60)
+
+
+class TokenBucket:
+    """Token bucket por chave, com limite de chaves guardadas (LRU)."""
+
+    def __init__(self, capacity, per_seconds, max_keys=4096):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """Consome uma ficha; devolve 0 ou quantos segundos faltam para a próxima."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0 if allowed else (1 - tokens) / self.rate
+
+
+class PasswordHasher:
+    """Executor limitado para gerar e conferir hashes de senha."""
+
+    def __init__(self):
+        self.method = DEFAULT_METHOD
+        self.workers = 1
+        self.timeout = 10
+        self._slots = None
+        self._executor = None
+        self._pid = None
+        self._active = 0
+        self._lock = threading.Lock()
+        self._prefix = None
+        self._dummy_hash = None
+
+    def configure(self, method, workers, queue, timeout):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        # Quem espera o hash ocupa uma thread da requisição: sobra ao menos uma por worker
+        # para o site público, qualquer que seja o LOGIN_HASH_QUEUE
+        limit = max(1, gunicorn_threads() - 1)
+        if queue is None:
+            queue = max(0, limit - workers)
+        self._slots = threading.BoundedSemaphore(max(1, min(workers + queue, limit)))
+        self._prefix = self._dummy_hash = None
+
+    def _get_executor(self):
+        # Threads não sobrevivem ao fork do gunicorn (preload_app): um executor por processo
+        if self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hash')
+            self._pid = os.getpid()
+        return self._executor
+
+    def _run(self, func, *args, wait=False):
+        if self._slots is None:  # fora de uma app configurada (scripts)
+            return func(*args)
+        slots = self._slots
+        if not slots.acquire(blocking=wait, timeout=self.timeout if wait else None):
+            raise LoginBusy()
+        with self._lock:
+            if self._active >= self.workers:
+                metrics.increment('cpi_login_queued_total')
+            self._active += 1
+        started = time.perf_counter()
+
+        def done(future):
+            # A vaga só volta quando o hash termina, mesmo que a requisição já tenha desistido
+            with self._lock:
+                self._active -= 1
+            slots.release()
+            metrics.increment('cpi_password_hashes_total')
+            metrics.increment('cpi_password_hash_seconds_total', time.perf_counter() - started)
+
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            done(None)
+            raise
+        future.add_done_callback(done)
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            raise LoginBusy() from None
+
+    def hash(self, password, wait=True):
+        return self._run(generate_password_hash, password, self.method, wait=wait)
+
+    def verify(self, password_hash, password):
+        """Confere a senha; sem hash (usuário inexistente) compara com um hash aleatório."""
+        if password_hash is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = self.hash(secrets.token_urlsafe(16))
+            self._run(check_password_hash, self._dummy_hash, password)
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True se o hash foi gerado com outro método/custo que o configurado."""
+        if self._prefix is None:
+            # 'scrypt' → 'scrypt:32768:8:1': o Werkzeug completa os parâmetros padrão
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._prefix
+
+
+password_hasher = PasswordHasher()
+
+
+def hash_password(password):
+    """Hash no método configurado (usado por Usuario.set_password)."""
+    if has_app_context() and 'login_guard' in current_app.extensions:
+        return password_hasher.hash(password)
+    return generate_password_hash(password, DEFAULT_METHOD)
+
+
+class LoginGuard:
+    """Limites de tentativas + verificação de senha para a rota de login."""
+
+    def __init__(self):
+        self.by_ip = None
+        self.by_username = None
+        self.trusted_proxies = 0
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+        app.config.setdefault('LOGIN_HASH_WORKERS', 1)
+        app.config.setdefault('LOGIN_HASH_QUEUE', None)
+        app.config.setdefault('LOGIN_HASH_TIMEOUT', 10)
+        app.config.setdefault('LOGIN_RATE_IP', '10/60')
+        app.config.setdefault('LOGIN_RATE_USERNAME', '20/300')
+        app.config.setdefault('LOGIN_TRUSTED_PROXIES', 0)
+        password_hasher.configure(app.config['PASSWORD_HASH_METHOD'], app.config['LOGIN_HASH_WORKERS'],
+                                  app.config['LOGIN_HASH_QUEUE'], app.config['LOGIN_HASH_TIMEOUT'])
+        self.by_ip = TokenBucket(*_parse_rate(app.config['LOGIN_RATE_IP']))
+        self.by_username = TokenBucket(*_parse_rate(app.config['LOGIN_RATE_USERNAME']))
+        self.trusted_proxies = app.config['LOGIN_TRUSTED_PROXIES']
+        app.extensions['login_guard'] = self
+
+    def client_ip(self):
+        # Atrás de N proxies confiáveis (Railway: 1), o IP real é o N-ésimo do fim do X-Forwarded-For
+        route = request.access_route
+        if self.trusted_proxies and len(route) >= self.trusted_proxies:
+            return route[-self.trusted_proxies]
+        return request.remote_addr
+
+    def throttle(self, username):
+        """0 se a tentativa pode seguir, ou os segundos até poder tentar de novo."""
+        ip = self.client_ip()
+        wait = max(self.by_ip.take(ip), self.by_username.take(username.lower()))
+        if wait:
+            metrics.increment('cpi_login_attempts_total', result='throttled')
+        return wait
+
+    def verify(self, user, password):
+        """Confere a senha de `user` (pode ser None); refaz o hash se o método mudou.
+
+        Levanta LoginBusy quando o executor está cheio.
+        """
+        try:
+            valid = password_hasher.verify(user.password_hash if user else None, password)
+        except LoginBusy:
+            metrics.increment('cpi_login_attempts_total', result='busy')
+            raise
+        metrics.increment('cpi_login_attempts_total', result='ok' if valid else 'invalid')
+        if valid and password_hasher.needs_rehash(user.password_hash):
+            # Novo hash muda a session_version: as outras sessões do usuário são encerradas
+            user.password_hash = password_hasher.hash(password)
+            metrics.increment('cpi_login_rehash_total')
+        return valid
+
+    def summary(self):
+        """Contadores de login somados entre os workers, para o admin."""
+        counters = metrics.counters()
+        summary = {result: counters.get(f'cpi_login_attempts_total{{result="{result}"}}', 0)
+                   for result in ATTEMPT_RESULTS}
+        summary['queued'] = counters.get('cpi_login_queued_total', 0)
+        summary['rehashed'] = counters.get('cpi_login_rehash_total', 0)
+        hashes = counters.get('cpi_password_hashes_total', 0)
+        summary['avg_hash_ms'] = counters.get('cpi_password_hash_seconds_total', 0) / hashes * 1000 if hashes else None
+        return summary
+
+
+login_guard = LoginGuard()
@@ -0,0 +1,78 @@
+# app/queries.py
+"""Formatos de carga reutilizáveis para as consultas de posts.
+
+Cada listagem carrega só as colunas que exibe e traz o autor no mesmo SELECT
+quando o template o mostra, para que uma página custe um número fixo de
+consultas independentemente da quantidade de linhas.
+"""
+from datetime import datetime
+
+from sqlalchemy import case, select, true
+from sqlalchemy.orm import defer, joinedload
+
+from . import db
+from .cache import LRUCache
+from .models import Depoimento, Evento, Post, Usuario
+
+# Estatísticas do dashboard: TTL curto + invalidação nas escritas de conteúdo
+_dashboard_cache = LRUCache(max_entries=1, ttl=60)
+
+# Blog público: título e resumo, sem o corpo do post
+POST_LIST = (defer(Post.content),)
+
+# Listagem do admin: só título, data e status
+POST_ADMIN_LIST = (defer(Post.content), defer(Post.summary))
+
+# Página do post: exibe o nome do autor
+POST_DETAIL = (joinedload(Post.author).load_only(Usuario.username),)
+
+
+def user_has_posts(user_id):
+    """EXISTS em vez de carregar todos os posts do usuário."""
+    return db.session.query(Post.query.filter_by(author_id=user_id).exists()).scalar()
+
+
+def published_posts_count():
+    return db.session.query(db.func.count(Post.id)).filter_by(is_published=True).scalar()
+
+
+def _count_where(condition):
+    return db.func.count(case((condition, 1)))
+
+
+def dashboard_stats():
+    """Contagens do dashboard em um único SELECT (contagens condicionais por tabela)."""
+    stats = _dashboard_cache.get('stats')
+    if stats is not None:
+        return stats
+
+    posts = select(
+        db.func.count(Post.id).label('posts_count'),
+        _count_where(Post.is_published.is_(True)).label('published_posts'),
+    ).subquery()
+    depoimentos = select(
+        db.func.count(Depoimento.id).label('depoimentos_count'),
+        _count_where(Depoimento.is_visible.is_(False)).label('hidden_depoimentos'),
+    ).subquery()
+    eventos = select(
+        db.func.count(Evento.id).label('eventos_count'),
+        _count_where(Evento.is_active.is_(True)).label('active_eventos'),
+        _count_where(Evento.is_active.is_(True) & (Evento.event_date >= datetime.now())).label('upcoming_eventos'),
+    ).subquery()
+    # Cada subconsulta devolve uma única linha: o join é só para juntar as colunas
+    single_row = posts.join(depoimentos, true()).join(eventos, true())
+    stats = dict(db.session.execute(select(posts, depoimentos, eventos).select_from(single_row)).mappings().one())
+    stats['drafts_posts'] = stats['posts_count'] - stats['published_posts']
+
+    # Rascunhos por autor (só autores com rascunhos)
+    stats['drafts_by_author'] = (
+        db.session.query(Usuario.username, db.func.count(Post.id))
+        .join(Post.author)
+        .filter(Post.is_published.is_(False))
+        .group_by(Usuario.username)
+        .order_by(db.func.count(Post.id).desc())
+        .all()
+    )
+
+    _dashboard_cache.set('stats', stats, tags=(Post, Depoimento, Evento))
+    return stats
@@ -1,37 +1,110 @@
 # app/routes.py
-from flask import Blueprint, render_template, request
-from .models import Depoimento, Post, Evento
+from flask import (Blueprint, Response, abort, current_app, render_template, request, stream_template,
+                   stream_with_context, url_for)
+from markupsafe import escape
+from sqlalchemy import func
+from . import db
+from .models import Depoimento, Evento, Post, Usuario
+from .cache import cached_page, conditional
+from .compression import send_precompressed
+from .fragments import lazy
+from .pagination import DeferredPage, keyset_paginate
+from .queries import POST_DETAIL, POST_LIST, published_posts_count
+from .scheduler import pregenerated_sitemap
+from .search import search_posts
 
 main_bp = Blueprint('main', __name__)
 
+# Modo streaming (STREAM_TEMPLATES): o <head> sai antes das consultas da página
+STREAM_CHUNK_SIZE = 4096
+
+def _coalesce(chunks):
+    """Junta os pedaços do Jinja em blocos de ~4 KB, liberando logo o fim do <head>."""
+    buffer, size = [], 0
+    try:
+        for chunk in chunks:
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= STREAM_CHUNK_SIZE or '</head>' in chunk:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield ''.join(buffer)
+    finally:
+        chunks.close()
+
+def render_page(template, **context):
+    """render_template, ou stream_template quando STREAM_TEMPLATES está ligado."""
+    if current_app.config['STREAM_TEMPLATES']:
+        return Response(_coalesce(stream_template(template, **context)), mimetype='text/html')
+    return render_template(template, **context)
+
+def paginate(*args, **kwargs):
+    """keyset_paginate; no modo streaming só consulta quando o template usa a página."""
+    if current_app.config['STREAM_TEMPLATES']:
+        return DeferredPage(*args, **kwargs)
+    return keyset_paginate(*args, **kwargs)
+
+# Validadores do GET condicional: última alteração + quantidade de linhas
+# (a quantidade detecta exclusões, que não alteram o max(updated_at))
+def published_posts_version(**kwargs):
+    return db.session.query(func.max(Post.updated_at), func.count(Post.id)).filter_by(is_published=True).one()
+
+def post_version(slug):
+    # O nome do autor aparece na página: renomear o usuário também muda o ETag
+    row = (db.session.query(Post.updated_at, Usuario.username).join(Post.author)
+           .filter(Post.slug == slug, Post.is_published.is_(True)).first())
+    return (row.updated_at, row.username) if row else None
+
+def active_eventos_version(**kwargs):
+    return db.session.query(func.max(Evento.updated_at), func.count(Evento.id)).filter_by(is_active=True).one()
+
 @main_bp.route('/')
+@cached_page(Depoimento, Evento)
 def home():
-    depoimentos_db = Depoimento.query.filter_by(is_visible=True).order_by(Depoimento.id.desc()).limit(8).all()
-    eventos_ativos = Evento.query.filter_by(is_active=True).order_by(Evento.event_date.asc()).limit(6).all()
-    
+    # Consultas só executadas se o template usar o resultado (trecho fora do cache)
+    depoimentos_db = lazy(Depoimento.query.filter_by(is_visible=True).order_by(Depoimento.id.desc()).limit(8))
+    eventos_ativos = lazy(Evento.query.filter_by(is_active=True).order_by(Evento.event_date.asc()).limit(6))
+
     return render_template('index.html',
                          depoimentos=depoimentos_db,
                          eventos=eventos_ativos)
 
 # ROTA PARA A LISTAGEM DO BLOG - APENAS POSTS PUBLICADOS
 @main_bp.route('/blog')
+@conditional(published_posts_version, Post)
+@cached_page(Post, params=('cursor',))
 def blog_list():
-    page = request.args.get('page', 1, type=int)
-    pagination = Post.query.filter_by(is_published=True).order_by(Post.date_posted.desc()).paginate(page=page, per_page=9, error_out=False)
-    return render_template('blog_list.html', posts=pagination.items, pagination=pagination)
+    pagination = paginate(Post.query.options(*POST_LIST).filter_by(is_published=True),
+                          [Post.date_posted, Post.id], per_page=9, descending=True,
+                          cursor=request.args.get('cursor'), total_key='blog_list')
+    return render_page('blog_list.html', posts=pagination, pagination=pagination)
+
+# BUSCA NO BLOG (índice full-text, ver search.py)
+# Fora do cache de páginas: cada `q` livre viraria uma entrada e expulsaria as páginas do blog
+@main_bp.route('/blog/busca')
+def blog_search():
+    query = request.args.get('q', '').strip()[:100]
+    results = search_posts(query) if query else []
+    return render_template('blog_search.html', query=query, results=results)
 
 # ROTA DINÂMICA PARA UM POST INDIVIDUAL - APENAS PUBLICADOS
 @main_bp.route('/blog/<string:slug>')
+@conditional(post_version, Post, Usuario)
+@cached_page(Post, Usuario)
 def blog_post(slug):
-    post = Post.query.filter_by(slug=slug, is_published=True).first_or_404()
-    return render_template('blog_post.html', post=post)
+    post = Post.query.options(*POST_DETAIL).filter_by(slug=slug, is_published=True).first_or_404()
+    return render_page('blog_post.html', post=post)
 
 # Rota para eventos públicos
 @main_bp.route('/eventos')
+@conditional(active_eventos_version, Evento)
+@cached_page(Evento, params=('cursor',))
 def eventos_public():
-    page = request.args.get('page', 1, type=int)
-    pagination = Evento.query.filter_by(is_active=True).order_by(Evento.event_date.asc()).paginate(page=page, per_page=10, error_out=False)
-    return render_template('eventos.html', eventos=pagination.items, pagination=pagination)
+    pagination = paginate(Evento.query.filter_by(is_active=True),
+                          [Evento.event_date, Evento.id], per_page=10,
+                          cursor=request.args.get('cursor'), total_key='eventos_public')
+    return render_page('eventos.html', eventos=pagination, pagination=pagination)
 
 @main_bp.route('/casamento-em-crise')
 def casamento_crise():
@@ -44,47 +117,94 @@ def health():
     return 'OK', 200
 
 # Sitemap dinâmico com posts
+SITE_URL = 'https://www.casamentoplanoinfalivel.com.br'
+SITEMAP_MAX_URLS = 50000  # limite do protocolo por arquivo
+SITEMAP_BATCH_SIZE = 1000
+
+# (endpoint, prioridade, frequência)
+SITEMAP_PAGES = [
+    ('main.home', '1.0', 'weekly'),
+    ('main.blog_list', '0.8', 'daily'),
+    ('main.eventos_public', '0.7', 'weekly'),
+    ('main.casamento_crise', '0.9', 'monthly'),
+]
+
+def sitemap_version(**kwargs):
+    posts_updated, posts_count = published_posts_version()
+    eventos_updated, eventos_count = active_eventos_version()
+    return max(filter(None, (posts_updated, eventos_updated)), default=None), (posts_count, eventos_count)
+
+def _sitemap_url(path, priority, changefreq, lastmod=None):
+    lastmod = f'    <lastmod>{lastmod.strftime("%Y-%m-%d")}</lastmod>\n' if lastmod else ''
+    return (
+        '  <url>\n'
+        f'    <loc>{SITE_URL}{escape(path)}</loc>\n'
+        f'{lastmod}'
+        f'    <priority>{priority}</priority>\n'
+        f'    <changefreq>{changefreq}</changefreq>\n'
+        '  </url>\n'
+    )
+
+def _sitemap_pages():
+    eventos_updated = active_eventos_version()[0]
+    for endpoint, priority, changefreq in SITEMAP_PAGES:
+        lastmod = eventos_updated if endpoint == 'main.eventos_public' else None
+        yield _sitemap_url(url_for(endpoint), priority, changefreq, lastmod)
+
+def _sitemap_posts(offset=0, limit=None):
+    # Só as colunas necessárias, lidas em lotes (sem carregar content/summary)
+    query = (db.session.query(Post.slug, Post.updated_at)
+             .filter_by(is_published=True)
+             .order_by(Post.date_posted, Post.id)
+             .offset(offset)
+             .limit(limit)
+             .execution_options(yield_per=SITEMAP_BATCH_SIZE))
+    for slug, updated_at in query:
+        yield _sitemap_url(url_for('main.blog_post', slug=slug), '0.7', 'monthly', updated_at)
+
+def _urlset(*sections):
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    for section in sections:
+        yield from section
+    yield '</urlset>\n'
+
+def _xml_response(chunks):
+    return Response(stream_with_context(chunks), mimetype='application/xml')
+
+def sitemap_chunks():
+    """Conteúdo do /sitemap.xml incluindo posts publicados e eventos.
+
+    Acima do limite de URLs do protocolo vira um índice de sitemaps filhos.
+    """
+    posts_count = published_posts_count()
+    if posts_count + len(SITEMAP_PAGES) <= SITEMAP_MAX_URLS:
+        yield from _urlset(_sitemap_pages(), _sitemap_posts())
+        return
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    yield f'  <sitemap><loc>{SITE_URL}{url_for("main.sitemap_pages")}</loc></sitemap>\n'
+    for page in range(1, -(-posts_count // SITEMAP_MAX_URLS) + 1):
+        yield f'  <sitemap><loc>{SITE_URL}{url_for("main.sitemap_posts", page=page)}</loc></sitemap>\n'
+    yield '</sitemapindex>\n'
+
 @main_bp.route('/sitemap.xml')
+@conditional(sitemap_version, Post, Evento)
 def sitemap():
-    """Sitemap dinâmico incluindo posts publicados"""
-    posts = Post.query.filter_by(is_published=True).all()
-    
-    urls = [
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
-        '  <url>',
-        '    <loc>https://www.casamentoplanoinfalivel.com.br/</loc>',
-        '    <priority>1.0</priority>',
-        '    <changefreq>weekly</changefreq>',
-        '  </url>',
-        '  <url>',
-        '    <loc>https://www.casamentoplanoinfalivel.com.br/blog</loc>',
-        '    <priority>0.8</priority>',
-        '    <changefreq>daily</changefreq>',
-        '  </url>',
-        '  <url>',
-        '    <loc>https://www.casamentoplanoinfalivel.com.br/eventos</loc>',
-        '    <priority>0.7</priority>',
-        '    <changefreq>weekly</changefreq>',
-        '  </url>',
-        '  <url>',
-        '    <loc>https://www.casamentoplanoinfalivel.com.br/casamento-em-crise</loc>',
-        '    <priority>0.9</priority>',
-        '    <changefreq>monthly</changefreq>',
-        '  </url>',
-    ]
-    
-    # Adicionar posts dinâmicos
-    for post in posts:
-        lastmod = post.date_posted.strftime('%Y-%m-%d') if post.date_posted else ''
-        urls.extend([
-            '  <url>',
-            f'    <loc>https://www.casamentoplanoinfalivel.com.br/blog/{post.slug}</loc>',
-            f'    <lastmod>{lastmod}</lastmod>',
-            '    <priority>0.7</priority>',
-            '    <changefreq>monthly</changefreq>',
-            '  </url>',
-        ])
-    
-    urls.append('</urlset>')
-    return '\n'.join(urls), 200, {'Content-Type': 'application/xml; charset=utf-8'}
\ No newline at end of file
+    """Sitemap dinâmico; serve o arquivo gerado em segundo plano quando atualizado."""
+    path = pregenerated_sitemap()
+    if path:
+        return send_precompressed(path, 'application/xml')
+    return _xml_response(sitemap_chunks())
+
+@main_bp.route('/sitemap-paginas.xml')
+@conditional(active_eventos_version, Evento)
+def sitemap_pages():
+    return _xml_response(_urlset(_sitemap_pages()))
+
+@main_bp.route('/sitemap-posts-<int:page>.xml')
+@conditional(published_posts_version, Post)
+def sitemap_posts(page):
+    if page < 1:
+        abort(404)
+    return _xml_response(_urlset(_sitemap_posts((page - 1) * SITEMAP_MAX_URLS, SITEMAP_MAX_URLS)))
@@ -0,0 +1,341 @@
+# app/scheduler.py
+"""Tarefas em segundo plano (APScheduler), fora do caminho das requisições.
+
+Cada worker do gunicorn inicia um BackgroundScheduler no post_fork. As tarefas
+de líder rodam em um único worker, o que detém a trava de líder:
+- PostgreSQL: pg_try_advisory_lock em uma conexão mantida aberta;
+- SQLite: flock em instance/scheduler/leader.lock.
+A trava é liberada quando o processo termina; os demais workers tentam
+assumir a cada LEADER_RETRY segundos. Tarefas locais rodam em todos os
+workers (o cache de páginas é por processo).
+
+A última execução de cada tarefa (duração, resultado, erro) e os totais ficam
+em instance/scheduler/job-<nome>.json (atualizado sob flock, já que tarefas
+locais rodam em todos os workers), exibidos em /admin/metricas e /metrics.
+`flask jobs run <nome>` executa uma tarefa na hora.
+"""
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import text, update
+
+from . import db
+from .models import Evento
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos (desenvolvimento)
+    fcntl = None
+
+LEADER_RETRY = 60  # segundos entre tentativas de assumir a liderança
+LEADER_LOCK_ID = 7_368_041  # chave do advisory lock no PostgreSQL
+EVENT_EXPIRY_GRACE = timedelta(hours=6)  # evento some da agenda 6h depois do início
+# Arquivos gerados antes do processo iniciar podem vir de uma versão anterior do código
+_BOOT_NS = time.time_ns()
+
+
+class Job:
+    def __init__(self, name, func, seconds, leader=True, description=''):
+        self.name = name
+        self.func = func
+        self.seconds = seconds
+        self.leader = leader
+        self.description = description
+
+
+# Tarefas
+# =======
+
+def expire_events():
+    # event_date é gravado no horário local (ver dashboard_stats)
+    cutoff = datetime.now() - EVENT_EXPIRY_GRACE
+    result = db.session.execute(
+        update(Evento)
+        .where(Evento.is_active.is_(True), Evento.event_date < cutoff)
+        .values(is_active=False, updated_at=datetime.now(timezone.utc))
+    )
+    # O commit invalida os caches de Evento em todos os workers (ver cache.py)
+    db.session.commit()
+    return f'{result.rowcount} eventos desativados'
+
+
+def sitemap_path():
+    return os.path.join(scheduler.directory, 'sitemap.xml')
+
+
+def pregenerated_sitemap():
+    """Caminho do sitemap gerado em segundo plano, ou None se estiver desatualizado."""
+    from .cache import content_versions
+
+    if not scheduler.directory:
+        return None
+    path = sitemap_path()
+    try:
+        generated = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    changed = [mtime for mtime in content_versions.stamps(('Post', 'Evento')).values() if mtime]
+    return path if all(mtime <= generated for mtime in [_BOOT_NS, *changed]) else None
+
+
+def refresh_sitemap():
+    from .compression import write_precompressed
+    from .routes import SITE_URL, sitemap_chunks
+
+    if pregenerated_sitemap():
+        return 'sitemap em dia'
+    # A marca de tempo é a do início: um commit durante a geração deixa o arquivo desatualizado
+    started = time.time_ns()
+    path = sitemap_path()
+    tmp = f'{path}.tmp'
+    with current_app.test_request_context('/sitemap.xml', base_url=SITE_URL):
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            for chunk in sitemap_chunks():
+                fh.write(chunk)
+    with open(tmp, 'rb') as fh:
+        write_precompressed(path, fh.read(), started)
+    os.utime(tmp, ns=(started, started))
+    os.replace(tmp, path)
+    return f'sitemap gerado ({os.path.getsize(path)} bytes)'
+
+
+_warmed_stamps = None
+
+
+def mark_pages_warm(stamps):
+    """Registra que as páginas já foram aquecidas com essas marcas de conteúdo.
+
+    Chamado no when_ready do gunicorn: os workers herdam o valor no fork e a
+    primeira execução de warm_pages não renderiza as mesmas páginas de novo.
+    """
+    global _warmed_stamps
+    _warmed_stamps = stamps
+
+
+def warm_pages():
+    global _warmed_stamps
+    from .cache import content_versions
+    from .warmup import warm_caches
+
+    if not current_app.config.get('PAGE_CACHE_ENABLED'):
+        return 'cache de páginas desligado'
+    stamps = content_versions.stamps()
+    if stamps == _warmed_stamps:
+        return 'cache em dia'
+    statuses = warm_caches(current_app)
+    _warmed_stamps = stamps
+    return f'{len(statuses)} páginas renderizadas'
+
+
+def rollup_metrics():
+    from .metrics import metrics
+
+    return f'{metrics.compact()} arquivos de workers encerrados consolidados'
+
+
+JOBS = [
+    Job('expire_events', expire_events, 10 * 60, description='Desativa eventos que já passaram'),
+    Job('refresh_sitemap', refresh_sitemap, 5 * 60, description='Gera o sitemap.xml quando o conteúdo muda'),
+    Job('rollup_metrics', rollup_metrics, 30 * 60, description='Consolida métricas de workers encerrados'),
+    Job('warm_pages', warm_pages, 60, leader=False, description='Renderiza as páginas principais após mudanças'),
+]
+
+
+# Agendador
+# =========
+
+class JobScheduler:
+    """BackgroundScheduler por worker + trava de líder entre os processos."""
+
+    def __init__(self):
+        self.app = None
+        self.directory = None
+        self.jobs = {job.name: job for job in JOBS}
+        self.is_leader = False
+        self._scheduler = None
+        self._lock_handle = None
+        self._state_lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('SCHEDULER_ENABLED', True)
+        self.app = app
+        self.directory = app.config.get('SCHEDULER_DIR') or os.path.join(app.instance_path, 'scheduler')
+        os.makedirs(self.directory, exist_ok=True)
+
+    def start(self):
+        """Inicia o agendador deste processo (chamado no post_fork do gunicorn)."""
+        if self._scheduler or not self.app.config['SCHEDULER_ENABLED']:
+            return
+        from apscheduler.schedulers.background import BackgroundScheduler
+
+        self._scheduler = BackgroundScheduler(daemon=True, job_defaults={'coalesce': True, 'max_instances': 1})
+        for job in self.jobs.values():
+            if not job.leader:
+                self._add(job)
+        self._scheduler.add_job(self._elect, 'interval', seconds=LEADER_RETRY, id='_elect',
+                                next_run_time=datetime.now())
+        self._scheduler.start()
+
+    def shutdown(self):
+        if self._scheduler:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+        self._release()
+
+    def _add(self, job):
+        self._scheduler.add_job(self.run, 'interval', seconds=job.seconds, args=[job.name], id=job.name,
+                                next_run_time=datetime.now() + timedelta(seconds=5))
+
+    # Liderança
+    # ---------
+
+    def _elect(self):
+        if self.is_leader and not self._still_leader():
+            self.app.logger.warning('Agendador: trava de líder perdida')
+            self.is_leader = False
+            self._release()
+            for job in self.jobs.values():
+                if job.leader and self._scheduler.get_job(job.name):
+                    self._scheduler.remove_job(job.name)
+        if not self.is_leader and self._acquire():
+            self.is_leader = True
+            self.app.logger.info(f'Agendador: worker {os.getpid()} assumiu as tarefas de líder')
+            for job in self.jobs.values():
+                if job.leader:
+                    self._add(job)
+
+    def _acquire(self):
+        with self.app.app_context():
+            engine = db.engine
+        if engine.dialect.name == 'postgresql':
+            connection = engine.connect()
+            acquired = connection.execute(text('SELECT pg_try_advisory_lock(:id)'), {'id': LEADER_LOCK_ID}).scalar()
+            connection.commit()
+            if not acquired:
+                connection.close()
+                return False
+            self._lock_handle = connection
+            return True
+        if fcntl is None:
+            return True
+        handle = open(os.path.join(self.directory, 'leader.lock'), 'w')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._lock_handle = handle
+        return True
+
+    def _still_leader(self):
+        # A trava do PostgreSQL acaba junto com a conexão que a detém
+        if self._lock_handle is None or not hasattr(self._lock_handle, 'execute'):
+            return True
+        try:
+            self._lock_handle.execute(text('SELECT 1'))
+            self._lock_handle.commit()
+            return True
+        except Exception:
+            return False
+
+    def _release(self):
+        if self._lock_handle is not None:
+            try:
+                if hasattr(self._lock_handle, 'invalidate'):
+                    # Descarta a conexão em vez de devolvê-la ao pool com a trava ainda ativa
+                    self._lock_handle.invalidate()
+                self._lock_handle.close()
+            except Exception:
+                pass
+            self._lock_handle = None
+
+    # Execução e estado
+    # -----------------
+
+    def _state_path(self, name):
+        return os.path.join(self.directory, f'job-{name}.json')
+
+    @contextmanager
+    def _file_lock(self, name):
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, f'job-{name}.lock'), 'w') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _read_state(self, name):
+        try:
+            with open(self._state_path(name), encoding='utf-8') as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {'name': name, 'runs': 0, 'failures': 0, 'total_duration': 0.0}
+
+    def run(self, name):
+        """Executa a tarefa no contexto do app e registra duração e resultado."""
+        job = self.jobs[name]
+        started = time.perf_counter()
+        error = result = None
+        with self.app.app_context():
+            try:
+                result = job.func()
+            except Exception as exc:
+                db.session.rollback()
+                error = f'{type(exc).__name__}: {exc}'
+                self.app.logger.exception(f'Tarefa {name} falhou')
+        duration = time.perf_counter() - started
+
+        # O estado é compartilhado: tarefas locais rodam em todos os workers
+        with self._state_lock, self._file_lock(name):
+            state = self._read_state(name)
+            state.update(last_run=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                         last_duration=duration, result=result, error=error, pid=os.getpid())
+            state['runs'] += 1
+            state['failures'] += 1 if error else 0
+            state['total_duration'] += duration
+            tmp = f'{self._state_path(name)}.{os.getpid()}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as fh:
+                json.dump(state, fh)
+            os.replace(tmp, self._state_path(name))
+        return state
+
+    def status(self):
+        """Estado de todas as tarefas, na ordem de JOBS."""
+        states = {}
+        for path in glob.glob(os.path.join(self.directory or '', 'job-*.json')):
+            name = os.path.basename(path)[len('job-'):-len('.json')]
+            if name in self.jobs:
+                states[name] = self._read_state(name)
+        return [
+            {**states.get(job.name, {'runs': 0, 'failures': 0, 'total_duration': 0.0}),
+             'name': job.name, 'description': job.description, 'seconds': job.seconds, 'leader': job.leader}
+            for job in self.jobs.values()
+        ]
+
+    def prometheus(self):
+        lines = []
+        rows = self.status()
+        for name, field, kind, help_text in (
+            ('cpi_job_runs_total', 'runs', 'counter', 'Execuções da tarefa'),
+            ('cpi_job_failures_total', 'failures', 'counter', 'Execuções com erro'),
+            ('cpi_job_duration_seconds_total', 'total_duration', 'counter', 'Tempo total de execução'),
+            ('cpi_job_last_duration_seconds', 'last_duration', 'gauge', 'Duração da última execução'),
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for row in rows:
+                if row.get(field) is not None:
+                    lines.append(f'{name}{{job="{row["name"]}"}} {row[field]}')
+        return '\n'.join(lines) + '\n'
+
+
+scheduler = JobScheduler()
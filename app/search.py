@@ -0,0 +1,207 @@
+# app/search.py
+"""Busca textual do blog com índice full-text.
+
+- SQLite: tabela virtual FTS5 `post_fts` (rowid = post.id) com o texto puro
+  de título, resumo e conteúdo; acentos são ignorados pelo tokenizador e os
+  termos são buscados por prefixo (o FTS5 não tem stemmer em português).
+- PostgreSQL: coluna `post.search_vector` (tsvector) com índice GIN e a
+  configuração `pt_unaccent` (portuguese + unaccent).
+
+O índice é atualizado no after_flush da sessão sempre que um post é criado,
+editado ou excluído; `flask search rebuild` recria tudo.
+"""
+import html
+import re
+from collections import namedtuple
+
+import bleach
+from markupsafe import Markup, escape
+from sqlalchemy import DateTime, event, inspect, select, text
+
+from . import db
+from .models import Post
+
+SEARCH_LIMIT = 20
+MAX_TERMS = 8
+REBUILD_BATCH_SIZE = 500
+INDEXED_FIELDS = ('title', 'summary', 'content')
+
+# Marcadores de destaque: trocados por <mark> depois de escapar o texto
+HIGHLIGHT_START = '\ue000'
+HIGHLIGHT_STOP = '\ue001'
+
+SearchResult = namedtuple('SearchResult', 'slug title date_posted title_html snippet_html')
+
+SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS post_fts USING fts5("
+    "title, summary, body, tokenize = 'unicode61 remove_diacritics 2')",
+]
+POSTGRES_SCHEMA = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    DO $$ BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = portuguese);
+            ALTER TEXT SEARCH CONFIGURATION pt_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+        END IF;
+    END $$
+    """,
+    "ALTER TABLE post ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "CREATE INDEX IF NOT EXISTS ix_post_search_vector ON post USING gin (search_vector)",
+]
+
+_SQLITE_UPSERT = text(
+    "INSERT INTO post_fts (rowid, title, summary, body) VALUES (:id, :title, :summary, :body)"
+)
+_SQLITE_DELETE = text("DELETE FROM post_fts WHERE rowid = :id")
+# Título pesa mais que resumo, que pesa mais que o conteúdo
+_POSTGRES_UPDATE = text("""
+    UPDATE post SET search_vector =
+        setweight(to_tsvector('pt_unaccent', :title), 'A') ||
+        setweight(to_tsvector('pt_unaccent', :summary), 'B') ||
+        setweight(to_tsvector('pt_unaccent', :body), 'C')
+    WHERE id = :id
+""")
+
+_SQLITE_SEARCH = text("""
+    SELECT post.slug, post.title, post.date_posted,
+           highlight(post_fts, 0, :start, :stop) AS title_hl,
+           snippet(post_fts, 2, :start, :stop, '…', 24) AS snippet
+    FROM post_fts JOIN post ON post.id = post_fts.rowid
+    WHERE post_fts MATCH :query AND post.is_published
+    ORDER BY bm25(post_fts, 10.0, 4.0, 1.0)
+    LIMIT :limit
+""").columns(date_posted=DateTime)
+# ts_headline é caro: calculado só para as linhas que sobraram após o LIMIT
+_POSTGRES_SEARCH = text("""
+    SELECT ranked.slug, ranked.title, ranked.date_posted,
+           ts_headline('pt_unaccent', ranked.title, ranked.query, :title_options) AS title_hl,
+           ts_headline('pt_unaccent', regexp_replace(ranked.content, '<[^>]+>', ' ', 'g'),
+                       ranked.query, :snippet_options) AS snippet
+    FROM (
+        SELECT post.slug, post.title, post.date_posted, post.content, query,
+               ts_rank_cd(post.search_vector, query) AS rank
+        FROM post, websearch_to_tsquery('pt_unaccent', :query) AS query
+        WHERE post.is_published AND post.search_vector @@ query
+        ORDER BY rank DESC, post.id DESC
+        LIMIT :limit
+    ) AS ranked
+    ORDER BY ranked.rank DESC
+""").columns(date_posted=DateTime)
+
+
+def plain_text(content):
+    """Texto puro de um HTML (sem tags nem entidades)."""
+    return html.unescape(bleach.clean(content or '', tags=[], strip=True))
+
+
+def _terms(query):
+    return re.findall(r'\w+', query or '')[:MAX_TERMS]
+
+
+def _highlight(value):
+    escaped = escape(value or '')
+    return Markup(escaped.replace(HIGHLIGHT_START, Markup('<mark>'))
+                  .replace(HIGHLIGHT_STOP, Markup('</mark>')))
+
+
+def create_schema(connection):
+    """Cria a estrutura do índice (idempotente)."""
+    statements = {'sqlite': SQLITE_SCHEMA, 'postgresql': POSTGRES_SCHEMA}.get(connection.dialect.name, [])
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+
+def _index_post(connection, post_id, title, summary, content):
+    params = {'id': post_id, 'title': title or '', 'summary': summary or '', 'body': plain_text(content)}
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        connection.execute(_SQLITE_DELETE, {'id': post_id})
+        connection.execute(_SQLITE_UPSERT, params)
+    elif dialect == 'postgresql':
+        connection.execute(_POSTGRES_UPDATE, params)
+
+
+def _after_flush(session, flush_context):
+    connection = session.connection()
+    for obj in session.new | session.dirty:
+        if not isinstance(obj, Post):
+            continue
+        state = inspect(obj)
+        if obj in session.new or any(state.attrs[field].history.has_changes() for field in INDEXED_FIELDS):
+            _index_post(connection, obj.id, obj.title, obj.summary, obj.content)
+    if connection.dialect.name == 'sqlite':
+        for obj in session.deleted:
+            if isinstance(obj, Post):
+                connection.execute(_SQLITE_DELETE, {'id': obj.id})
+
+
+def rebuild_index(connection=None):
+    """Recria o índice de todos os posts e devolve quantos foram indexados.
+
+    Sem `connection`, usa a sessão e faz commit; com ela (migrações), quem
+    chamou controla a transação.
+    """
+    own_transaction = connection is None
+    if own_transaction:
+        connection = db.session.connection()
+    create_schema(connection)
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('DELETE FROM post_fts')
+    table = Post.__table__
+    query = select(table.c.id, table.c.title, table.c.summary, table.c.content).order_by(table.c.id)
+    count, last_id = 0, None
+    while True:
+        # Em lotes pelo id, sem carregar o conteúdo de todos os posts de uma vez
+        batch = query.where(table.c.id > last_id) if last_id is not None else query
+        rows = connection.execute(batch.limit(REBUILD_BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+        for row in rows:
+            _index_post(connection, *row)
+        count += len(rows)
+        last_id = rows[-1].id
+    if own_transaction:
+        db.session.commit()
+    return count
+
+
+def search_posts(query, limit=SEARCH_LIMIT):
+    """Posts publicados que casam com `query`, do mais ao menos relevante."""
+    terms = _terms(query)
+    if not terms:
+        return []
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        rows = db.session.execute(_SQLITE_SEARCH, {
+            'query': match, 'limit': limit, 'start': HIGHLIGHT_START, 'stop': HIGHLIGHT_STOP,
+        })
+    elif dialect == 'postgresql':
+        selectors = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}'
+        rows = db.session.execute(_POSTGRES_SEARCH, {
+            'query': ' '.join(terms), 'limit': limit,
+            'title_options': f'{selectors}, HighlightAll=true',
+            'snippet_options': f'{selectors}, MaxWords=35, MinWords=15, MaxFragments=2',
+        })
+    else:
+        raise RuntimeError(f'Dialeto não suportado: {dialect}')
+    return [
+        SearchResult(slug, title, date_posted, _highlight(title_hl), _highlight(snippet))
+        for slug, title, date_posted, title_hl, snippet in rows
+    ]
+
+
+class SearchIndex:
+    """Mantém o índice full-text sincronizado com a tabela post."""
+
+    _listening = False
+
+    def init_app(self, app):
+        if not SearchIndex._listening:
+            event.listen(db.session, 'after_flush', _after_flush)
+            SearchIndex._listening = True
+
+
+search_index = SearchIndex()
@@ -0,0 +1,10 @@
+// Aplica os CSS carregados com media="print" (ver app/critical.py).
+// Arquivo externo: a CSP não permite o onload inline no <link>.
+document.querySelectorAll('link[data-async-css]').forEach(function (link) {
+  function apply() { link.media = 'all'; }
+  if (link.sheet) {
+    apply();
+  } else {
+    link.addEventListener('load', apply);
+  }
+});
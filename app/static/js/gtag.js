@@ -0,0 +1,6 @@
+// Google tag (gtag.js) - arquivo externo para o HTML das páginas não depender da nonce CSP
+window.dataLayer = window.dataLayer || [];
+function gtag() { dataLayer.push(arguments); }
+gtag('js', new Date());
+
+gtag('config', 'G-5QWHHDMTCS');
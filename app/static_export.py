@@ -0,0 +1,189 @@
+# app/static_export.py
+"""Exportação do site público como arquivos estáticos (nginx/CDN).
+
+As páginas são renderizadas pelo test client e o site é percorrido a partir
+das páginas iniciais seguindo os links internos, de modo que toda página de
+paginação e todo post publicado acabam exportados sem manter uma lista à parte.
+
+Um manifest (.export-manifest.json) guarda, para cada URL, o arquivo gerado e
+de quais dados ela depende. No modo incremental só as URLs afetadas por uma
+alteração (ex.: `Post:12`, `Evento`) são renderizadas de novo; páginas que
+deixaram de existir são removidas.
+
+Páginas com cursor (`/blog?cursor=X`) viram `blog/_cursor/X.html`; no nginx:
+
+    location = /blog {
+        if ($arg_cursor) { rewrite ^ /blog/_cursor/$arg_cursor.html last; }
+        try_files /blog/index.html =404;
+    }
+"""
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+from werkzeug.exceptions import HTTPException
+
+from . import db
+from .models import Post
+
+MANIFEST_NAME = '.export-manifest.json'
+START_URLS = ['/', '/blog', '/eventos', '/casamento-em-crise', '/sitemap.xml']
+
+# endpoint -> modelos dos quais a página depende
+ENDPOINT_DEPENDENCIES = {
+    'main.home': ['Depoimento', 'Evento'],
+    'main.blog_list': ['Post'],
+    'main.blog_post': [],  # depende só do próprio post (Post:<id>)
+    'main.eventos_public': ['Evento'],
+    'main.casamento_crise': [],
+    'main.sitemap': ['Post', 'Evento'],
+    'main.sitemap_pages': ['Evento'],
+    'main.sitemap_posts': ['Post'],
+}
+
+_LINK = re.compile(r'(?:href="|<loc>)([^"<]+)')
+
+
+def _route(app, url):
+    """(endpoint, view_args) de uma URL pública, ou None."""
+    parts = urlsplit(url)
+    try:
+        endpoint, view_args = app.url_map.bind('localhost').match(parts.path)
+    except HTTPException:
+        return None
+    if endpoint not in ENDPOINT_DEPENDENCIES:
+        return None
+    return endpoint, view_args
+
+
+def _normalize(url, site_url):
+    url = html.unescape(url)
+    if site_url and url.startswith(site_url):
+        url = url[len(site_url):] or '/'
+    if not url.startswith('/') or url.startswith('//'):
+        return None
+    url = url.split('#', 1)[0]
+    parts = urlsplit(url)
+    cursor = parse_qs(parts.query).get('cursor')
+    # Só a query string de paginação é exportável
+    return f'{parts.path}?cursor={cursor[0]}' if cursor else parts.path
+
+
+def output_path(url):
+    parts = urlsplit(url)
+    path = parts.path.strip('/')
+    cursor = parse_qs(parts.query).get('cursor')
+    if cursor:
+        return os.path.join(path, '_cursor', f'{cursor[0]}.html')
+    if os.path.splitext(path)[1]:
+        return path
+    return os.path.join(path, 'index.html')
+
+
+def _dependencies(endpoint, view_args):
+    deps = list(ENDPOINT_DEPENDENCIES[endpoint])
+    if endpoint == 'main.blog_post':
+        post_id = db.session.query(Post.id).filter_by(slug=view_args['slug']).scalar()
+        deps.append(f'Post:{post_id}')
+    return deps
+
+
+def _load_manifest(output):
+    try:
+        with open(os.path.join(output, MANIFEST_NAME), encoding='utf-8') as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def _remove(output, url, manifest):
+    entry = manifest.pop(url, None)
+    if entry:
+        path = os.path.join(output, entry['file'])
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def export_site(app, output, changed=None, site_url=None, copy_static=True):
+    """Exporta o site público para `output`.
+
+    `changed` (ex.: {'Post', 'Post:12'}) ativa o modo incremental. Devolve um
+    dicionário com as URLs escritas e removidas.
+    """
+    from .routes import SITE_URL
+
+    site_url = site_url or SITE_URL
+    output = os.path.abspath(output)
+    os.makedirs(output, exist_ok=True)
+    manifest = _load_manifest(output) if changed else {}
+
+    if changed:
+        # 'Post:12' também afeta as páginas que dependem de qualquer Post
+        changed = set(changed) | {tag.split(':', 1)[0] for tag in changed}
+        affected = {url for url, entry in manifest.items() if changed & set(entry['deps'])}
+        queue = deque(sorted(affected))
+        for tag in changed:
+            model, _, pk = tag.partition(':')
+            if model == 'Post' and pk:
+                slug = db.session.query(Post.slug).filter_by(id=int(pk), is_published=True).scalar()
+                if slug:
+                    queue.append(f'/blog/{slug}')
+    else:
+        affected = set()
+        queue = deque(START_URLS)
+
+    written, seen = [], set(queue)
+    cache_enabled = app.config.get('PAGE_CACHE_ENABLED')
+    app.config['PAGE_CACHE_ENABLED'] = False
+    try:
+        with app.test_client() as client:
+            while queue:
+                url = queue.popleft()
+                route = _route(app, url)
+                if route is None:
+                    continue
+                response = client.get(url, base_url=site_url)
+                if response.status_code != 200:
+                    continue
+                body = response.get_data()
+                path = output_path(url)
+                target = os.path.join(output, path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, 'wb') as fh:
+                    fh.write(body)
+                manifest[url] = {
+                    'file': path,
+                    'deps': _dependencies(*route),
+                    'sha256': hashlib.sha256(body).hexdigest(),
+                }
+                written.append(url)
+
+                for link in _LINK.findall(body.decode('utf-8', 'replace')):
+                    link = _normalize(link, site_url)
+                    if not link or link in seen:
+                        continue
+                    # No modo incremental, páginas não afetadas já estão atualizadas
+                    if changed and link in manifest and link not in affected:
+                        continue
+                    seen.add(link)
+                    queue.append(link)
+    finally:
+        app.config['PAGE_CACHE_ENABLED'] = cache_enabled
+
+    # Páginas afetadas que não foram geradas de novo deixaram de existir
+    removed = sorted(affected - set(written))
+    for url in removed:
+        _remove(output, url, manifest)
+
+    if copy_static and not changed:
+        shutil.copytree(app.static_folder, os.path.join(output, app.static_url_path.strip('/')),
+                        dirs_exist_ok=True, ignore=shutil.ignore_patterns('.gitignore'))
+
+    with open(os.path.join(output, MANIFEST_NAME), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+    return {'written': written, 'removed': removed}
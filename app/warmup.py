@@ -0,0 +1,79 @@
+# app/warmup.py
+"""Aquecimento do app antes de receber tráfego (usado pelo gunicorn.conf.py).
+
+- Templates: compilados uma vez no processo mestre (os workers herdam o cache
+  do Jinja via fork) e gravados em um FileSystemBytecodeCache, que evita
+  recompilar após um restart ou deploy sem mudança nos templates.
+- Caches: as páginas públicas principais são renderizadas no mestre, então
+  cada worker já nasce com o cache de páginas preenchido.
+- Banco: no mestre o pool é descartado antes do fork; em cada worker as
+  conexões são abertas antes da primeira requisição.
+"""
+import os
+
+from jinja2 import FileSystemBytecodeCache
+
+from . import db
+
+WARMUP_URLS = ['/', '/blog', '/eventos', '/casamento-em-crise']
+
+
+def init_app(app):
+    app.config.setdefault('TEMPLATE_BYTECODE_CACHE', True)
+    if not app.config['TEMPLATE_BYTECODE_CACHE']:
+        return
+    directory = app.config.get('TEMPLATE_BYTECODE_DIR') or os.path.join(app.instance_path, 'jinja')
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def precompile_templates(app):
+    """Carrega (e compila) todos os templates; devolve quantos foram compilados."""
+    names = [name for name in app.jinja_env.list_templates() if name.endswith(('.html', '.xml', '.txt'))]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def warm_caches(app, base_url=None):
+    """Renderiza as páginas públicas principais; devolve {url: status}.
+
+    O cache de páginas separa as entradas pelo host, então as requisições
+    usam o endereço público do site (ou `base_url`).
+    """
+    from .metrics import SKIP_ENVIRON_KEY
+    from .routes import SITE_URL
+
+    statuses = {}
+    with app.test_client() as client:
+        for url in WARMUP_URLS:
+            # Uma requisição por codificação: o cache guarda as variantes comprimidas.
+            # Requisições internas não entram nas métricas.
+            for encoding in ('gzip', 'br'):
+                response = client.get(url, base_url=base_url or SITE_URL, headers={'Accept-Encoding': encoding},
+                                      environ_overrides={SKIP_ENVIRON_KEY: True})
+            statuses[url] = response.status_code
+    return statuses
+
+
+def dispose_engine(app):
+    """Fecha as conexões abertas no mestre para que nenhum worker as herde."""
+    with app.app_context():
+        db.engine.dispose()
+
+
+def prime_pool(app, size):
+    """Abre `size` conexões do pool do worker antes da primeira requisição."""
+    with app.app_context():
+        engine = db.engine
+        # Descarta sem fechar as conexões que porventura vieram do mestre
+        engine.dispose(close=False)
+        connections = []
+        try:
+            for _ in range(size):
+                connection = engine.connect()
+                connection.exec_driver_sql('SELECT 1')
+                connections.append(connection)
+        finally:
+            for connection in connections:
+                connection.close()
@@ -0,0 +1,10 @@
+# asgi.py
+"""Ponto de entrada da API JSON (ASGI): uvicorn asgi:api"""
+from dotenv import load_dotenv
+
+# Carrega variáveis do .env, como o run.py
+load_dotenv()
+
+from app.api import create_api  # noqa: E402
+
+api = create_api()
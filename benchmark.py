@@ -0,0 +1,338 @@
+# benchmark.py
+"""Benchmark de latência e throughput das rotas públicas e do admin.
+
+Roda cada rota de routes.py e as principais do admin de duas formas:
+- wsgi: pelo test client do Flask, no mesmo processo (sem rede);
+- gunicorn: contra um processo gunicorn real, com requisições concorrentes.
+
+Para cada rota mostra req/s, p50/p95/p99 (ms) e consultas SQL por requisição
+(lidas do cabeçalho Server-Timing). Com --baseline compara com um resultado
+salvo e termina com código 1 se o p95 piorar além do limite, se alguma
+rota passar a fazer mais consultas ou se alguma requisição falhar.
+
+Uso:
+    flask seed-bulk --posts 5000 --events 300 --depoimentos 500
+    python benchmark.py --save-baseline benchmark-baseline.json
+    python benchmark.py --baseline benchmark-baseline.json --threshold 0.2
+
+O banco usado é o do DATABASE_URL (.env). O benchmark cria um usuário
+temporário para as rotas do admin e o remove ao final.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import secrets
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+# Server-Timing é a fonte da contagem de consultas; HTTPS forçado atrapalharia o gunicorn local
+os.environ['METRICS_ENABLED'] = '1'
+os.environ['METRICS_SERVER_TIMING'] = '1'
+if os.environ.get('FLASK_ENV') == 'production':
+    os.environ['FLASK_ENV'] = 'development'
+
+BENCH_USERNAME = 'benchmark-temp'
+MIN_DELTA_MS = 1.0  # diferenças menores que isso são ruído
+PUBLIC_ROUTES = [
+    ('home', '/'),
+    ('blog_list', '/blog'),
+    ('blog_post', None),  # descoberto na listagem
+    ('blog_list_cursor', None),
+    ('blog_search', '/blog/busca?q=casamento'),
+    ('eventos', '/eventos'),
+    ('casamento_crise', '/casamento-em-crise'),
+    ('sitemap', '/sitemap.xml'),
+    ('health', '/health'),
+]
+ADMIN_ROUTES = [
+    ('admin_dashboard', '/admin/'),
+    ('admin_posts', '/admin/posts'),
+    ('admin_depoimentos', '/admin/depoimentos'),
+    ('admin_eventos', '/admin/eventos'),
+    ('admin_usuarios', '/admin/usuarios'),
+]
+
+_CSRF = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"')
+_SQL_COUNT = re.compile(r'desc="(\d+) SQL"')
+
+
+# Clientes
+# ========
+
+class WSGIClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, url):
+        response = self.client.get(url)
+        return response.status_code, response.headers, response.get_data(as_text=True)
+
+    def post(self, url, data):
+        response = self.client.post(url, data=data)
+        return response.status_code
+
+    def fork(self):
+        return self
+
+
+class HTTPClient:
+    def __init__(self, base_url, cookies=None):
+        import requests
+        self.base_url = base_url
+        self.session = requests.Session()
+        if cookies:
+            self.session.cookies.update(cookies)
+
+    def get(self, url):
+        response = self.session.get(self.base_url + url, allow_redirects=False)
+        return response.status_code, response.headers, response.text
+
+    def post(self, url, data):
+        return self.session.post(self.base_url + url, data=data, allow_redirects=False).status_code
+
+    def fork(self):
+        # requests.Session não é thread-safe: uma por thread, com os mesmos cookies
+        return HTTPClient(self.base_url, self.session.cookies.get_dict())
+
+
+def login(client, password):
+    _status, _headers, body = client.get('/admin/login')
+    token = _CSRF.search(body)
+    data = {'username': BENCH_USERNAME, 'password': password}
+    if token:
+        data['csrf_token'] = token.group(1)
+    if client.post('/admin/login', data) != 302:
+        raise RuntimeError('Falha no login do usuário de benchmark')
+
+
+def discover_routes(client, include_admin):
+    _status, _headers, body = client.get('/blog')
+    slug = re.search(r'href="/blog/(?!busca)([^"?/]+)"', body)
+    cursor = re.search(r'href="/blog\?cursor=([\w-]+)"', body)
+    found = {
+        'blog_post': f'/blog/{slug.group(1)}' if slug else None,
+        'blog_list_cursor': f'/blog?cursor={cursor.group(1)}' if cursor else None,
+    }
+    routes = [(name, url or found.get(name)) for name, url in PUBLIC_ROUTES]
+    if include_admin:
+        routes += ADMIN_ROUTES
+    return [(name, url) for name, url in routes if url]
+
+
+# Medição
+# =======
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def measure(client, url, requests_count, concurrency, warmup):
+    for _ in range(warmup):
+        client.get(url)
+
+    def one(worker_client):
+        start = time.perf_counter()
+        status, headers, _body = worker_client.get(url)
+        elapsed = (time.perf_counter() - start) * 1000
+        queries = _SQL_COUNT.search(headers.get('Server-Timing', ''))
+        return status, elapsed, int(queries.group(1)) if queries else None
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        results = [one(client) for _ in range(requests_count)]
+    else:
+        clients = [client.fork() for _ in range(concurrency)]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(one, clients[i % concurrency]) for i in range(requests_count)]
+            results = [future.result() for future in futures]
+    wall = time.perf_counter() - started
+
+    timings = [elapsed for _status, elapsed, _queries in results]
+    queries = [q for _status, _elapsed, q in results if q is not None]
+    errors = sum(1 for status, _elapsed, _queries in results if status >= 400)
+    return {
+        'requests': requests_count,
+        'errors': errors,
+        'rps': round(requests_count / wall, 1),
+        'p50': round(percentile(timings, 0.50), 2),
+        'p95': round(percentile(timings, 0.95), 2),
+        'p99': round(percentile(timings, 0.99), 2),
+        'queries': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def run_suite(client, routes, requests_count, concurrency, warmup):
+    results = {}
+    for name, url in routes:
+        results[name] = measure(client, url, requests_count, concurrency, warmup)
+        results[name]['url'] = url
+        print_row(name, results[name])
+    return results
+
+
+# gunicorn
+# ========
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(workers):
+    import requests
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'run:app', '--bind', f'127.0.0.1:{port}',
+         '--workers', str(workers), '--log-level', 'warning'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env={**os.environ, 'PORT': str(port), 'GUNICORN_ACCESS_LOG': ''},
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn terminou durante a inicialização')
+        try:
+            if requests.get(base_url + '/health', timeout=1).status_code == 200:
+                return process, base_url
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn não respondeu em 30s')
+
+
+# Relatório e comparação
+# ======================
+
+def print_header(title):
+    print(f'\n== {title} ==')
+    print(f'{"rota":<20} {"req/s":>8} {"p50":>8} {"p95":>8} {"p99":>8} {"SQL":>6} {"erros":>6}')
+
+
+def print_row(name, result):
+    queries = '-' if result['queries'] is None else f'{result["queries"]:g}'
+    print(f'{name:<20} {result["rps"]:>8} {result["p50"]:>8} {result["p95"]:>8} '
+          f'{result["p99"]:>8} {queries:>6} {result["errors"]:>6}')
+
+
+def compare(results, baseline, threshold):
+    """Lista de regressões em relação ao baseline."""
+    regressions = []
+    for mode, routes in results.items():
+        for name, current in routes.items():
+            # Erro rápido derruba o p95: qualquer status >= 400 conta como regressão
+            if current['errors']:
+                regressions.append(f'{mode}/{name}: {current["errors"]} erro(s) em {current["requests"]} requisições')
+            previous = baseline.get(mode, {}).get(name)
+            if not previous:
+                continue
+            limit = previous['p95'] * (1 + threshold)
+            if current['p95'] > limit and current['p95'] - previous['p95'] > MIN_DELTA_MS:
+                regressions.append(f'{mode}/{name}: p95 {previous["p95"]}ms → {current["p95"]}ms '
+                                   f'(limite {limit:.2f}ms)')
+            if previous.get('queries') is not None and current['queries'] is not None \
+                    and current['queries'] > previous['queries']:
+                regressions.append(f'{mode}/{name}: consultas {previous["queries"]:g} → {current["queries"]:g}')
+    return regressions
+
+
+# Usuário temporário do admin
+# ===========================
+
+def create_bench_user(app):
+    from app import db
+    from app.models import Usuario
+    password = secrets.token_urlsafe(16) + 'Aa1'
+    with app.app_context():
+        Usuario.query.filter_by(username=BENCH_USERNAME).delete()
+        user = Usuario(username=BENCH_USERNAME, is_active=True)
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+    return password
+
+
+def delete_bench_user(app):
+    from app import db
+    from app.models import Usuario
+    with app.app_context():
+        Usuario.query.filter_by(username=BENCH_USERNAME).delete()
+        db.session.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--mode', choices=['wsgi', 'gunicorn', 'both'], default='both')
+    parser.add_argument('--requests', type=int, default=200, help='requisições por rota')
+    parser.add_argument('--warmup', type=int, default=10, help='requisições descartadas por rota')
+    parser.add_argument('--concurrency', type=int, default=8, help='clientes simultâneos (gunicorn)')
+    parser.add_argument('--workers', type=int, default=2, help='workers do gunicorn')
+    parser.add_argument('--no-admin', action='store_true', help='só rotas públicas')
+    parser.add_argument('--no-page-cache', action='store_true', help='desliga o cache de páginas')
+    parser.add_argument('--baseline', help='arquivo JSON para comparar')
+    parser.add_argument('--threshold', type=float, default=0.15, help='piora tolerada no p95 (0.15 = 15%%)')
+    parser.add_argument('--save-baseline', metavar='ARQUIVO', help='grava os resultados como baseline')
+    args = parser.parse_args(argv)
+
+    if args.no_page_cache:
+        os.environ['PAGE_CACHE_ENABLED'] = '0'
+
+    from app import create_app
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = True
+    password = None if args.no_admin else create_bench_user(app)
+    results = {}
+    try:
+        if args.mode in ('wsgi', 'both'):
+            client = WSGIClient(app)
+            if password:
+                login(client, password)
+            print_header('WSGI (test client)')
+            results['wsgi'] = run_suite(client, discover_routes(client, password), args.requests, 1, args.warmup)
+
+        if args.mode in ('gunicorn', 'both'):
+            process, base_url = start_gunicorn(args.workers)
+            try:
+                client = HTTPClient(base_url)
+                if password:
+                    login(client, password)
+                print_header(f'gunicorn ({args.workers} workers, {args.concurrency} clientes)')
+                results['gunicorn'] = run_suite(client, discover_routes(client, password), args.requests,
+                                                args.concurrency, args.warmup)
+            finally:
+                process.terminate()
+                process.wait(timeout=10)
+    finally:
+        if password:
+            delete_bench_user(app)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=2, sort_keys=True)
+        print(f'\n💾 Baseline salvo em {args.save_baseline}')
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'\n❌ {len(regressions)} regressão(ões) em relação a {args.baseline}:')
+            for regression in regressions:
+                print(f'   {regression}')
+            return 1
+        print(f'\n✅ Sem regressões em relação a {args.baseline} (limite {args.threshold:.0%})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# gunicorn.conf.py
+"""Configuração do gunicorn em produção (`gunicorn -c gunicorn.conf.py run:app`).
+
+- Workers/threads proporcionais à cota de CPU do container, com no máximo
+  4 workers por padrão (WEB_CONCURRENCY e GUNICORN_THREADS sobrescrevem).
+- preload_app: o app é importado uma vez no mestre e os workers compartilham
+  essa memória (copy-on-write).
+- Antes do primeiro fork o mestre compila todos os templates (bytecode em
+  instance/jinja) e renderiza as páginas públicas principais; cada worker
+  abre suas conexões com o banco antes de aceitar requisições e inicia o
+  agendador de tarefas (app/scheduler.py).
+- max_requests com jitter recicla os workers aos poucos, sem reiniciar
+  todos ao mesmo tempo.
+"""
+import os
+
+# Mesma conta usada para dimensionar o pool do banco (app/database.py)
+from app.database import gunicorn_threads, web_concurrency
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = web_concurrency()
+threads = gunicorn_threads()
+worker_class = 'gthread' if threads > 1 else 'sync'
+preload_app = True
+
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = max(1, max_requests // 10)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+WARMUP = os.environ.get('GUNICORN_WARMUP', '1') == '1'
+
+
+def when_ready(server):
+    # Com preload_app o app já foi importado; roda no mestre antes do primeiro fork
+    from app import warmup
+
+    app = server.app.wsgi()
+    compiled = warmup.precompile_templates(app)
+    server.log.info('Templates pré-compilados: %d', compiled)
+    if WARMUP:
+        from app.cache import content_versions
+        from app.scheduler import mark_pages_warm
+
+        stamps = content_versions.stamps()
+        statuses = warmup.warm_caches(app)
+        # Os workers herdam a marca: o primeiro warm_pages de cada um não repete o trabalho
+        mark_pages_warm(stamps)
+        server.log.info('Páginas aquecidas: %s', ', '.join(f'{url} {status}' for url, status in statuses.items()))
+    warmup.dispose_engine(app)
+
+
+def post_fork(server, worker):
+    from app import warmup
+    from app.scheduler import scheduler
+
+    try:
+        warmup.prime_pool(server.app.wsgi(), threads)
+    except Exception as exc:  # banco indisponível não deve derrubar o worker
+        worker.log.warning('Falha ao abrir conexões com o banco: %s', exc)
+    # Threads não sobrevivem ao fork: cada worker inicia o seu agendador
+    scheduler.start()
+
+
+def worker_exit(server, worker):
+    from app.metrics import metrics
+    from app.scheduler import scheduler
+
+    scheduler.shutdown()  # libera a trava de líder para outro worker
+    metrics.flush()  # o que o worker contou desde a última gravação periódica
@@ -0,0 +1,46 @@
+"""Adiciona updated_at em post, depoimento e evento
+
+Revision ID: 0001_updated_at
+Revises:
+Create Date: 2026-10-18 10:00:00
+
+As tabelas existentes foram criadas por db.create_all() (setup_railway.py /
+desenvolvimento), então esta revisão só adiciona as colunas que faltam.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_updated_at'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# tabela -> expressão usada para preencher as linhas já existentes
+TABLES = {
+    'post': 'date_posted',
+    'depoimento': 'CURRENT_TIMESTAMP',
+    'evento': 'CURRENT_TIMESTAMP',
+}
+
+
+def _has_column(table, column):
+    inspector = sa.inspect(op.get_bind())
+    return column in {c['name'] for c in inspector.get_columns(table)}
+
+
+def upgrade():
+    for table, backfill in TABLES.items():
+        if _has_column(table, 'updated_at'):
+            continue
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f'UPDATE {table} SET updated_at = {backfill}')
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('updated_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
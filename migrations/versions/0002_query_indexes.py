@@ -0,0 +1,47 @@
+"""Índices compostos para as consultas públicas e do admin
+
+Revision ID: 0002_query_indexes
+Revises: 0001_updated_at
+Create Date: 2026-10-18 11:00:00
+
+No PostgreSQL os índices das listagens públicas são parciais (só as linhas
+publicadas/visíveis/ativas). Índices já criados por db.create_all() são
+mantidos.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_query_indexes'
+down_revision = '0001_updated_at'
+branch_labels = None
+depends_on = None
+
+# (nome, tabela, colunas, predicado do índice parcial no PostgreSQL)
+INDEXES = [
+    ('ix_post_published_date', 'post', ['is_published', 'date_posted', 'id'], 'is_published'),
+    ('ix_post_date_posted', 'post', ['date_posted', 'id'], None),
+    ('ix_post_author_id', 'post', ['author_id'], None),
+    ('ix_depoimento_visible', 'depoimento', ['is_visible', 'id'], 'is_visible'),
+    ('ix_evento_active_date', 'evento', ['is_active', 'event_date', 'id'], 'is_active'),
+    ('ix_evento_event_date', 'evento', ['event_date', 'id'], None),
+]
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns, predicate in INDEXES:
+        if name in _existing_indexes(table):
+            continue
+        op.create_index(name, table, columns,
+                        postgresql_where=sa.text(predicate) if predicate else None)
+
+
+def downgrade():
+    for name, table, _columns, _predicate in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
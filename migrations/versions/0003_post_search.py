@@ -0,0 +1,35 @@
+"""Índice full-text dos posts (busca do blog)
+
+Revision ID: 0003_post_search
+Revises: 0002_query_indexes
+Create Date: 2026-10-18 13:00:00
+
+SQLite: tabela virtual FTS5 post_fts. PostgreSQL: coluna search_vector com
+índice GIN e configuração pt_unaccent (requer a extensão unaccent). O índice
+é preenchido aqui; depois é mantido pela aplicação (ver app/search.py).
+"""
+from alembic import op
+
+from app.search import rebuild_index
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_post_search'
+down_revision = '0002_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Cria a estrutura (idempotente) e indexa os posts existentes
+    rebuild_index(op.get_bind())
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS post_fts')
+    elif dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_post_search_vector')
+        op.execute('ALTER TABLE post DROP COLUMN IF EXISTS search_vector')
+        op.execute('DROP TEXT SEARCH CONFIGURATION IF EXISTS pt_unaccent')
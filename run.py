@@ -1,6 +1,8 @@
 from app import create_app, db
 from app.models import Usuario, Depoimento, Post, Evento
+from app.scheduler import JOBS, scheduler
 from datetime import datetime, timezone
+import click
 import os
 import sys
 import traceback
@@ -92,11 +94,203 @@ def seed_db():
         # Feedback das contagens após semear
         print(f"👤 Usuarios: {Usuario.query.count()} | 📰 Posts: {Post.query.count()} | 💬 Depoimentos: {Depoimento.query.count()} | 📅 Eventos: {Evento.query.count()}")
 
+@app.cli.command("seed-bulk")
+@click.option('--posts', default=0, show_default=True, help='Quantidade de posts')
+@click.option('--events', 'eventos', default=0, show_default=True, help='Quantidade de eventos')
+@click.option('--depoimentos', default=0, show_default=True, help='Quantidade de depoimentos')
+@click.option('--batch-size', default=1000, show_default=True, help='Linhas por INSERT')
+@click.option('--seed', default=42, show_default=True, help='Semente do gerador (dados reproduzíveis)')
+def seed_bulk_command(posts, eventos, depoimentos, batch_size, seed):
+    """Gera dados sintéticos em volume para testes de desempenho - APENAS PARA DESENVOLVIMENTO"""
+    if os.environ.get('FLASK_ENV') == 'production':
+        print("❌ ERRO: Não execute seed-bulk em produção!")
+        return
+    from app.bulk_seed import seed_bulk
+
+    def progress(model, inserted):
+        print(f"   {model}: {inserted}", end='\r', flush=True)
+
+    counts = seed_bulk(posts, eventos, depoimentos, batch_size=batch_size, seed=seed, progress=progress)
+    print()
+    print(f"✅ Inseridos → 📰 Posts: {counts['Post']} | 📅 Eventos: {counts['Evento']} | 💬 Depoimentos: {counts['Depoimento']}")
+
+@app.cli.group()
+def content():
+    """Exportação/importação de conteúdo em JSONL"""
+
+def _content_progress(content_type, count):
+    click.echo(f"   {content_type}: {count}", err=True)
+
+@content.command("export")
+@click.argument('output', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--type', 'types', multiple=True, type=click.Choice(['usuario', 'post', 'evento', 'depoimento']),
+              help='Tipos a exportar (padrão: todos)')
+@click.option('--with-passwords', is_flag=True, help='Inclui os hashes de senha dos usuários')
+@click.option('--batch-size', default=1000, show_default=True)
+def content_export(output, types, with_passwords, batch_size):
+    """Exporta usuários, posts, eventos e depoimentos (JSONL; '-' = stdout)"""
+    from app.content_io import CONTENT_TYPES, export_content
+    counts = export_content(output, types=types or CONTENT_TYPES, include_passwords=with_passwords,
+                            batch_size=batch_size, progress=_content_progress)
+    click.echo(f"✅ Exportados: {', '.join(f'{name}: {count}' for name, count in counts.items())}", err=True)
+
+@content.command("import")
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--batch-size', default=1000, show_default=True)
+def content_import(source, batch_size):
+    """Importa um JSONL gerado por `content export` (upsert por slug/username/id)"""
+    from app.content_io import ContentImportError, import_content
+    try:
+        counts = import_content(source, batch_size=batch_size, progress=_content_progress)
+    except ContentImportError as exc:
+        db.session.rollback()
+        print(f"❌ ERRO: {exc}")
+        sys.exit(1)
+    print(f"✅ Importados: {', '.join(f'{name}: {count}' for name, count in counts.items())}")
+
+@app.cli.group()
+def assets():
+    """Pipeline de arquivos estáticos (CSS/JS)"""
+
+@assets.command("build")
+def assets_build():
+    """Minifica CSS/JS, gera cópias com hash + .gz/.br e o manifest"""
+    from app.assets import build_assets, brotli
+    if brotli is None:
+        print("⚠️  Pacote brotli não instalado: gerando apenas variantes .gz")
+    manifest = build_assets(app)
+    for logical, built in manifest.items():
+        print(f"📦 {logical} → {built}")
+    print("✅ Assets gerados com sucesso!")
+
+@assets.command("critical")
+def assets_critical():
+    """Calcula o CSS acima da dobra de cada template público (critical.json)"""
+    from app.critical import MAX_SIZE, build_critical
+    manifest, skipped = build_critical(app)
+    for template, css in manifest.items():
+        warning = " ⚠️  maior que a primeira ida e volta do TCP" if len(css) > MAX_SIZE else ""
+        print(f"✂️  {template}: {len(css) / 1024:.1f} KB{warning}")
+    for endpoint in skipped:
+        print(f"⚠️  {endpoint}: página não renderizada (sem conteúdo publicado?), mantém os <link> normais")
+    print("✅ CSS crítico gerado! Reinicie o servidor para aplicar.")
+
+@app.cli.group()
+def images():
+    """Derivados responsivos das imagens"""
+
+@images.command("build")
+def images_build():
+    """Gera versões AVIF/WebP/JPEG redimensionadas das imagens + images.json"""
+    from app.images import build_images
+    manifest = build_images(app)
+    for logical, entry in manifest.items():
+        formats = ', '.join(entry['sources'])
+        widths = ', '.join(str(width) for _path, width in entry['sources'][entry['fallback']])
+        print(f"🖼️  {logical}: {formats} @ {widths}px")
+    print("✅ Imagens geradas! Rode `flask assets build` para atualizar as referências no CSS.")
+
+@app.cli.group()
+def fonts():
+    """Fontes e ícones servidos pelo próprio site"""
+
+@fonts.command("build")
+def fonts_build():
+    """Gera WOFF2 só com os ícones/pesos usados nos templates + fonts.json"""
+    from app.fonts import FontDownloadError, build_fonts
+    try:
+        manifest = build_fonts(app)
+    except FontDownloadError as exc:
+        # Sem fonts.json o site continua usando as fontes das CDNs; o deploy segue
+        print(f"⚠️  Não foi possível baixar as fontes ({exc})")
+        print("   Mantido o carregamento pelas CDNs. Rode `flask fonts build` de novo quando houver rede.")
+        return
+    for path in manifest['files']:
+        size = os.path.getsize(os.path.join(app.static_folder, path))
+        print(f"🔤 {path} ({size / 1024:.1f} KB)")
+    print(f"🎨 {len(manifest['icons'])} ícones: {', '.join(manifest['icons'])}")
+    if manifest['unknown_classes']:
+        print(f"⚠️  Classes fa-* sem ícone correspondente: {', '.join(manifest['unknown_classes'])}")
+    print("✅ Fontes geradas! Rode `flask assets build` e reinicie o servidor.")
+
+@app.cli.group()
+def search():
+    """Índice full-text do blog"""
+
+@search.command("rebuild")
+def search_rebuild():
+    """Recria o índice de busca de todos os posts"""
+    from app.search import rebuild_index
+    count = rebuild_index()
+    print(f"🔎 {count} posts indexados ({db.engine.dialect.name})")
+    print("✅ Índice de busca recriado!")
+
+@app.cli.group()
+def jobs():
+    """Tarefas em segundo plano (rodam sozinhas nos workers do gunicorn)"""
+
+@jobs.command("list")
+def jobs_list():
+    """Mostra a última execução de cada tarefa"""
+    for job in scheduler.status():
+        duration = f"{job['last_duration'] * 1000:.0f}ms" if 'last_duration' in job else '-'
+        print(f"⏱️  {job['name']:<16} a cada {job['seconds']}s | última: {job.get('last_run') or 'nunca'} "
+              f"({duration}) | {job.get('error') or job.get('result') or '-'}")
+
+@jobs.command("run")
+@click.argument('name', type=click.Choice([job.name for job in JOBS]))
+def jobs_run(name):
+    """Executa uma tarefa agora"""
+    state = scheduler.run(name)
+    if state['error']:
+        print(f"❌ {name}: {state['error']}")
+        sys.exit(1)
+    print(f"✅ {name}: {state['result']} ({state['last_duration'] * 1000:.0f}ms)")
+
+@app.cli.command("explain-queries")
+@click.option('--seqscan-off', is_flag=True, help='PostgreSQL: desliga seq scans para checar se há índice utilizável')
+@click.option('--verbose', is_flag=True, help='Mostra o SQL e o plano de todas as consultas')
+def explain_queries_command(seqscan_off, verbose):
+    """Roda EXPLAIN nas consultas das rotas públicas e aponta varreduras sequenciais"""
+    from app.explain import explain_queries
+    reports = explain_queries(app, seqscan_off=seqscan_off)
+    failures = [report for report in reports if report['problems']]
+    for report in reports:
+        if not (verbose or report['problems']):
+            continue
+        print(f"{'❌' if report['problems'] else '✅'} {report['url']}")
+        print(f"   {' '.join(report['sql'].split())}")
+        for line in report['plan']:
+            print(f"     {line}")
+        for problem in report['problems']:
+            print(f"   ⚠️  {problem}")
+    print(f"📊 {len(reports)} consultas analisadas, {len(failures)} com problemas ({db.engine.dialect.name})")
+    if failures:
+        sys.exit(1)
+
+@app.cli.command("export-static")
+@click.option('--output', default='export', show_default=True, help='Diretório de saída')
+@click.option('--changed', multiple=True, metavar='MODELO[:ID]',
+              help='Modo incremental: ex. --changed Post:12 --changed Depoimento')
+def export_static_command(output, changed):
+    """Renderiza o site público em HTML estático para nginx/CDN"""
+    from app.static_export import export_site
+    valid = {'Post', 'Evento', 'Depoimento'}
+    for tag in changed:
+        model, _, pk = tag.partition(':')
+        if model not in valid or (pk and not pk.isdigit()):
+            raise click.BadParameter(f"use {'/'.join(sorted(valid))} ou MODELO:ID", param_hint=f"--changed {tag}")
+    result = export_site(app, output, changed=set(changed) or None)
+    for url in result['removed']:
+        print(f"🗑️  {url}")
+    print(f"✅ {len(result['written'])} páginas exportadas em {output}/ ({len(result['removed'])} removidas)")
+
 # Configuração para produção
 if __name__ == '__main__':
     try:
         port = int(os.environ.get('PORT', 5000))
         print(f"🚀 Iniciando servidor na porta {port}")
+        scheduler.start()
         app.run(host='0.0.0.0', port=port, debug=False)
     except Exception as e:
         print(f"❌ Erro ao iniciar servidor: {e}")